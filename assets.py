@@ -0,0 +1,162 @@
+# 라벨별 콘텐츠(텍스트/이미지/동영상) 매니페스트와 썸네일 에셋 관리
+#
+#   python assets.py build     # content/manifest.json 의 이미지·유튜브 썸네일을 static/thumbs/ 에 작은 JPEG 로 생성
+#
+# 썸네일은 내용 해시로 이름을 붙이고, 원본 -> 썸네일 경로 대응은 static/thumbs/index.json 에 기록한다.
+# Streamlit 정적 파일 서빙(.streamlit/config.toml 의 enableStaticServing)으로 ./app/static/... 경로에서 제공된다.
+import os, re, sys, json, hashlib, logging, argparse, urllib.request
+from io import BytesIO
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CONTENT_DIR = os.path.join(BASE_DIR, "content")
+MANIFEST_PATH = os.path.join(CONTENT_DIR, "manifest.json")
+STATIC_DIR = os.path.join(BASE_DIR, "static")
+THUMB_DIR = os.path.join(STATIC_DIR, "thumbs")
+ASSET_INDEX_PATH = os.path.join(THUMB_DIR, "index.json")
+STATIC_URL = "./app/static"
+
+THUMB_MAX_SIDE = 480
+THUMB_QUALITY = 80
+
+logger = logging.getLogger(__name__)
+
+# ======================
+# 유튜브
+# ======================
+def yt_id_from_url(url: str) -> str | None:
+    if not url: return None
+    pats = [r"(?:v=|/)([0-9A-Za-z_-]{11})(?:\?|&|/|$)", r"youtu\.be/([0-9A-Za-z_-]{11})"]
+    for p in pats:
+        m = re.search(p, url)
+        if m: return m.group(1)
+    return None
+
+def yt_thumb(url: str) -> str | None:
+    vid = yt_id_from_url(url)
+    return f"https://img.youtube.com/vi/{vid}/hqdefault.jpg" if vid else None
+
+# ======================
+# 매니페스트 / 에셋 인덱스
+# ======================
+def load_manifest(path: str = MANIFEST_PATH) -> dict:
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+def load_asset_index(path: str = ASSET_INDEX_PATH) -> dict:
+    """원본 -> static 기준 상대 경로. 아직 빌드하지 않았으면 빈 dict."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+def is_remote(src: str) -> bool:
+    return src.startswith(("http://", "https://"))
+
+def asset_url(src: str | None, index: dict) -> str | None:
+    """렌더링에 쓸 이미지 주소. 빌드된 썸네일이 있으면 정적 경로, 없으면 원격 주소 그대로.
+    아직 빌드하지 않은 로컬 파일은 원본을 페이지에 싣지 않도록 경고만 남기고 건너뛴다(None)."""
+    if not src: return None
+    if src in index:
+        return f"{STATIC_URL}/{index[src]}"
+    if is_remote(src) or src.startswith("data:"):
+        return src
+    logger.warning("썸네일이 없어 건너뜁니다: %s (python assets.py build 를 실행하세요)", src)
+    return None
+
+def content_by_label(manifest: dict, labels: list[str], index: dict) -> dict[str, dict[str, list]]:
+    """매니페스트 항목을 라벨 이름에 연결한다. 항목은 "label"(이름) 또는 "index"(vocab 순서)로 라벨을 지정.
+
+    images 는 렌더링용 주소 목록, videos 는 (영상 주소, 썸네일 주소 또는 None) 목록으로 풀어 둔다.
+    """
+    out = {}
+    for entry in manifest.get("labels", []):
+        label = entry.get("label")
+        if label is None:
+            i = entry.get("index")
+            if i is None or not 0 <= i < len(labels): continue
+            label = labels[i]
+        out[label] = {
+            "texts": entry.get("texts", []),
+            "images": [u for u in (asset_url(s, index) for s in entry.get("images", [])) if u],
+            "videos": [(v, asset_url(yt_thumb(v), index)) for v in entry.get("videos", [])],
+        }
+    return out
+
+# ======================
+# 빌드
+# ======================
+def _read_source(src: str) -> bytes:
+    if is_remote(src):
+        req = urllib.request.Request(src, headers={"User-Agent": "Mozilla/5.0"})
+        with urllib.request.urlopen(req, timeout=30) as resp:
+            return resp.read()
+    with open(os.path.join(CONTENT_DIR, src), "rb") as fh:
+        return fh.read()
+
+def make_thumbnail(data: bytes, max_side: int = THUMB_MAX_SIDE, quality: int = THUMB_QUALITY) -> bytes:
+    from PIL import Image
+    from imaging import load_pil_from_bytes
+    src = Image.open(BytesIO(data))
+    pil = load_pil_from_bytes(data, min_side=max_side)
+    pil.thumbnail((max_side, max_side))
+    buf = BytesIO()
+    pil.save(buf, "JPEG", quality=quality, optimize=True, progressive=True)
+    if src.format == "JPEG" and max(src.size) <= max_side and len(data) <= buf.tell():
+        return data  # 이미 작은 JPEG 은 다시 인코딩해도 커지기만 한다
+    return buf.getvalue()
+
+def build_assets(manifest_path: str = MANIFEST_PATH, out_dir: str = THUMB_DIR,
+                 max_side: int = THUMB_MAX_SIDE, quality: int = THUMB_QUALITY) -> dict:
+    """매니페스트의 이미지와 유튜브 썸네일을 내려받아/읽어 축소·재인코딩하고 인덱스를 쓴다.
+
+    실패한 원본은 이전 인덱스 항목(썸네일이 남아 있으면)을 그대로 유지한다. 정리는 이전 인덱스에 있던
+    썸네일 중 더 이상 쓰지 않는 것만 지우므로 out_dir 의 다른 파일은 건드리지 않는다.
+    """
+    manifest = load_manifest(manifest_path)
+    sources = []
+    for entry in manifest.get("labels", []):
+        sources += [s for s in entry.get("images", []) if not s.startswith("data:")]
+        sources += [t for t in (yt_thumb(v) for v in entry.get("videos", [])) if t]
+    os.makedirs(out_dir, exist_ok=True)
+    index_path = os.path.join(out_dir, "index.json")
+    prev, index = load_asset_index(index_path), {}
+    for src in dict.fromkeys(sources):
+        try:
+            thumb = make_thumbnail(_read_source(src), max_side, quality)
+        except Exception as e:
+            old = prev.get(src)
+            if old and os.path.exists(os.path.join(os.path.dirname(out_dir), old)):
+                index[src] = old
+                print(f"실패, 이전 썸네일 유지: {src} ({type(e).__name__}: {e})", file=sys.stderr)
+            else:
+                print(f"건너뜀: {src} ({type(e).__name__}: {e})", file=sys.stderr)
+            continue
+        name = hashlib.sha256(thumb).hexdigest()[:16] + ".jpg"
+        path = os.path.join(out_dir, name)
+        if not os.path.exists(path):
+            with open(path, "wb") as fh:
+                fh.write(thumb)
+        index[src] = f"{os.path.basename(out_dir)}/{name}"
+        print(f"{src} -> {index[src]} ({len(thumb):,} bytes)", file=sys.stderr)
+    for rel in set(prev.values()) - set(index.values()):  # 이전 빌드에서 만든 것 중 더 이상 쓰지 않는 썸네일만 정리
+        path = os.path.join(os.path.dirname(out_dir), rel)
+        if os.path.exists(path):
+            os.remove(path)
+    with open(index_path, "w", encoding="utf-8") as fh:
+        json.dump(index, fh, ensure_ascii=False, indent=2)
+    return index
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="라벨 콘텐츠 썸네일 빌드")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="매니페스트의 이미지로 static/thumbs/ 썸네일과 인덱스 생성")
+    b.add_argument("--manifest", default=MANIFEST_PATH)
+    b.add_argument("--out", default=THUMB_DIR)
+    b.add_argument("--max-side", type=int, default=THUMB_MAX_SIDE)
+    b.add_argument("--quality", type=int, default=THUMB_QUALITY)
+    args = ap.parse_args(argv)
+    build_assets(args.manifest, args.out, args.max_side, args.quality)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+# 분류 파이프라인 오프라인 벤치마크
+#
+#   python bench.py 샘플폴더/ --model model.pkl
+#   python bench.py 샘플폴더/ --runtime model.onnx --sizes 640 4000 --formats JPEG WEBP --json
+#
+# 샘플 이미지를 여러 크기/형식으로 다시 인코딩한 뒤 앱과 같은 경로(load_pil_from_bytes -> MicroBatcher -> predict_many)로
+# 돌려 조합별 처리량, 단계별 지연시간 백분위수, 최대 메모리를 출력한다. 모델/이미지 코드 변경 전후 비교용.
+# decode 는 이미지당, predict 는 배치(--bs)당 시간이다. py peak 는 시간 측정이 끝난 뒤 tracemalloc 을 켠 별도 1회 실행으로 잰다.
+# rss peak 는 프로세스 시작 후 누적 최대값이므로 조합끼리 비교하려면 --sizes/--formats 를 하나씩 주고 따로 실행한다.
+import sys, json, time, resource, argparse, tracemalloc
+from io import BytesIO
+
+from PIL import Image
+
+from imaging import load_pil_from_path, load_pil_from_bytes, iter_image_files, chunked
+from scheduler import DEFAULT_MAX_BATCH, DEFAULT_MAX_WAIT_MS, MicroBatcher
+from timing import StageTimer
+
+DEFAULT_SIZES = (256, 1024, 3000)
+DEFAULT_FORMATS = ("JPEG", "PNG", "WEBP")
+
+def encode_variant(pil: Image.Image, long_side: int, fmt: str) -> bytes:
+    """원본을 긴 변 long_side 로 맞춰(확대 포함) fmt 형식으로 인코딩한다."""
+    scale = long_side / max(pil.size)
+    img = pil.resize((max(1, round(pil.width * scale)), max(1, round(pil.height * scale))), Image.BILINEAR)
+    buf = BytesIO()
+    img.save(buf, fmt, **({"quality": 90} if fmt in ("JPEG", "WEBP") else {}))
+    return buf.getvalue()
+
+def peak_rss_mb() -> float:
+    """프로세스 최대 RSS (MB). 리눅스는 KB, macOS 는 바이트 단위로 돌려준다."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1 << 20) if sys.platform == "darwin" else rss / 1024
+
+def _run(payloads: list[bytes], predict_batch, min_side: int | None, bs: int, timer: StageTimer) -> None:
+    for chunk in chunked(payloads, bs):
+        images = []
+        for b in chunk:
+            with timer.stage("decode"):
+                images.append(load_pil_from_bytes(b, min_side))
+        with timer.stage("predict"):
+            predict_batch(images)
+
+def run_case(payloads: list[bytes], predict_batch, min_side: int | None, bs: int, repeat: int) -> dict:
+    timer = StageTimer(window=len(payloads) * repeat)
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        _run(payloads, predict_batch, min_side, bs, timer)
+    wall = time.perf_counter() - t0
+    tracemalloc.start()  # 할당 추적은 느리므로 시간 측정과 분리한 1회 실행에서만 켠다
+    try:
+        _run(payloads, predict_batch, min_side, bs, StageTimer())
+        _, py_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    n = len(payloads) * repeat
+    return {"images": n, "seconds": wall, "images_per_sec": n / wall if wall else 0.0,
+            "ms_per_image": 1000 * wall / n, "stages": timer.summary(),
+            "py_peak_mb": py_peak / (1 << 20), "peak_rss_mb": peak_rss_mb()}
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="분류 파이프라인 벤치마크")
+    ap.add_argument("paths", nargs="+", help="샘플 이미지 파일/폴더")
+    ap.add_argument("--model", default="model.pkl", help="fastai 모델(.pkl)")
+    ap.add_argument("--runtime", default=None, help="내보낸 모델(.pt/.onnx). 지정하면 fastai 없이 측정")
+    ap.add_argument("--optimize", choices=["none", "dynamic", "static"], default="none")
+    ap.add_argument("--calib-dir", default=None, help="static 보정용 이미지 폴더 (static 필수, 샘플과 별도)")
+    ap.add_argument("--threads", type=int, default=None)
+    ap.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="긴 변 픽셀 수")
+    ap.add_argument("--formats", nargs="+", default=list(DEFAULT_FORMATS))
+    ap.add_argument("--bs", type=int, default=1, help="한 번에 스케줄러에 넣는 이미지 수 (1: 앱의 단일 이미지, 그 이상: 일괄 분류)")
+    ap.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH, help="앱의 SCHED_MAX_BATCH 와 같게 (forward 하나의 최대 크기)")
+    ap.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS, help="앱의 SCHED_MAX_WAIT_MS 와 같게")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--limit", type=int, default=20, help="사용할 샘플 이미지 수")
+    ap.add_argument("--no-downscale", action="store_true", help="축소 디코드를 끄고 원본 크기로 디코드")
+    ap.add_argument("--json", action="store_true", help="결과를 JSON 으로 출력")
+    args = ap.parse_args(argv)
+    if args.optimize == "static" and not args.calib_dir:
+        ap.error("--optimize static 에는 --calib-dir 이 필요합니다.")
+
+    if args.runtime:
+        from runtime import ExportedModel
+        engine = ExportedModel(args.runtime)
+        forward, size = engine.predict_many, engine.size
+        if args.threads:
+            from optimize import configure_threads
+            configure_threads(args.threads)
+    else:
+        from inference import load_model, input_size, predict_many, warm_up
+        learner = load_model(args.model)
+        if args.optimize != "none" or args.threads:
+            from optimize import optimize_learner
+            optimize_learner(learner, args.optimize, args.threads, calib_dir=args.calib_dir)
+        warm_up(learner)
+        size = input_size(learner)
+        forward = lambda ims: predict_many(learner, ims)
+    if args.bs > args.max_batch:
+        print(f"경고: --bs {args.bs} 는 --max-batch {args.max_batch} 장씩 나뉘어 추론됩니다 (앱과 동일).", file=sys.stderr)
+    scheduler = MicroBatcher(forward, args.max_batch, args.max_wait_ms)  # 앱과 같은 설정으로 큐 -> 추론 스레드를 거친다
+    predict_batch = scheduler.predict_many
+    min_side = None if args.no_downscale else 2 * max(size)
+
+    sources = [load_pil_from_path(p) for p in list(iter_image_files(args.paths))[:args.limit]]
+    if not sources:
+        print("샘플 이미지가 없습니다.", file=sys.stderr)
+        return 1
+    predict_batch([sources[0]])  # 워밍업
+
+    results = []
+    for fmt in args.formats:
+        for long_side in args.sizes:
+            payloads = [encode_variant(p, long_side, fmt) for p in sources]
+            r = run_case(payloads, predict_batch, min_side, args.bs, args.repeat)
+            r.update(format=fmt, long_side=long_side, avg_bytes=sum(map(len, payloads)) / len(payloads))
+            results.append(r)
+            if not args.json:
+                st = r["stages"]
+                print(f"{fmt:>5} {long_side:>5}px  {r['images_per_sec']:7.1f} img/s  "
+                      f"decode p50/p95/p99 {st['decode']['p50']:.1f}/{st['decode']['p95']:.1f}/{st['decode']['p99']:.1f}ms  "
+                      f"predict p50/p95/p99 {st['predict']['p50']:.1f}/{st['predict']['p95']:.1f}/{st['predict']['p99']:.1f}ms  "
+                      f"py peak {r['py_peak_mb']:.1f}MB  rss peak {r['peak_rss_mb']:.0f}MB")
+    if args.json:
+        json.dump({"bs": args.bs, "max_batch": args.max_batch, "repeat": args.repeat, "min_side": min_side, "results": results}, sys.stdout, indent=2)
+        print()
+    scheduler.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+# 이미지 입력 유틸 (PIL 만 사용 — fastai/torch 없이 import 가능)
+import os
+from io import BytesIO
+from PIL import Image, ImageOps
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".webp", ".tiff", ".tif")
+
+# 헤더상 픽셀 수가 이 값을 넘으면 디코드하지 않고 거부 (압축 폭탄 TIFF 등)
+MAX_PIXELS = 50_000_000
+Image.MAX_IMAGE_PIXELS = MAX_PIXELS
+
+def load_pil_from_bytes(b: bytes, min_side: int | None = None, max_pixels: int = MAX_PIXELS) -> Image.Image:
+    """바이트를 RGB 이미지로 디코드한다.
+
+    min_side 를 주면 짧은 변이 min_side 정도가 되도록 줄여서 디코드한다.
+    JPEG 은 draft 로 DCT 단계에서 1/2~1/8 로 축소해 읽고, EXIF 회전은 줄인 이미지에 적용한다.
+    """
+    pil = Image.open(BytesIO(b))  # 여기까지는 헤더만 읽음
+    w, h = pil.size
+    if w * h > max_pixels:
+        raise Image.DecompressionBombError(f"이미지가 너무 큽니다: {w}x{h} ({w * h:,} 픽셀 > {max_pixels:,})")
+    if min_side and min(w, h) > min_side:
+        scale = min_side / min(w, h)
+        size = (max(1, round(w * scale)), max(1, round(h * scale)))
+        if pil.format == "JPEG":
+            pil.draft("RGB", size)  # 요청 크기 이상이 되는 가장 작은 배율로 디코드
+        if pil.size != size:
+            pil = pil.resize(size, Image.BILINEAR, reducing_gap=2.0)
+    pil = ImageOps.exif_transpose(pil)
+    if pil.mode != "RGB": pil = pil.convert("RGB")
+    return pil
+
+def load_pil_from_path(path: str, min_side: int | None = None) -> Image.Image:
+    with open(path, "rb") as fh:
+        return load_pil_from_bytes(fh.read(), min_side)
+
+def iter_image_files(paths):
+    """파일/디렉터리 경로 목록을 이미지 파일 경로로 펼친다 (디렉터리는 재귀, 이름순)."""
+    for p in paths:
+        if os.path.isdir(p):
+            for root, dirs, files in os.walk(p):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(IMAGE_EXTS):
+                        yield os.path.join(root, name)
+        else:
+            yield p
+
+def chunked(it, n: int):
+    buf = []
+    for x in it:
+        buf.append(x)
+        if len(buf) == n:
+            yield buf
+            buf = []
+    if buf: yield buf
@@ -0,0 +1,231 @@
+# 추론 엔진: 모델 로드/예측/캐시/내보내기를 Streamlit 없이 쓸 수 있도록 분리한 모듈
+# fastai 는 실제로 필요한 함수 안에서만 import 한다 (--runtime 경로는 fastai 를 불러오지 않음)
+#
+#   python inference.py classify 사진폴더/ --model model.pkl --out preds.csv
+#   python inference.py export --model model.pkl --format onnx --out model.onnx
+#   python inference.py classify 사진폴더/ --runtime model.onnx   (fastai 없이 내보낸 모델로 추론)
+import os, sys, csv, json, time, hashlib, argparse, threading
+from collections import OrderedDict
+
+from imaging import load_pil_from_path, iter_image_files, chunked
+from model_store import ensure_model
+
+DEFAULT_FILE_ID = "1Tqr2znfekEJYzZBnm1UIT7QU3lkuVbv7"
+DEFAULT_MODEL_PATH = "model.pkl"
+
+# ======================
+# 모델 로드
+# ======================
+def load_model(output_path: str, file_id: str | None = None, sha256: str | None = None,
+               size: int | None = None, warmup: bool = False):
+    """검증된 모델 파일을 준비해 CPU learner 로 불러온다. warmup 이면 더미 이미지로 한 번 추론해 둔다."""
+    ensure_model(file_id, output_path, sha256, size)
+    from fastai.vision.all import load_learner  # 비전 타입/패치를 모두 등록해야 언피클이 안전함
+    learner = load_learner(output_path, cpu=True)
+    if warmup: warm_up(learner)
+    return learner
+
+def warm_up(learner) -> None:
+    """첫 사용자 요청이 지연 초기화 비용(변환 파이프라인 구성, 첫 forward 등)을 치르지 않도록 미리 한 번 돌린다."""
+    from PIL import Image
+    h, w = input_size(learner)
+    predict_one(learner, Image.new("RGB", (w, h)))
+
+def model_identity(path: str) -> str:
+    """모델 파일이 교체되면 캐시 키가 바뀌도록 경로/크기/수정시각으로 식별자를 만든다."""
+    stt = os.stat(path)
+    return f"{os.path.abspath(path)}:{stt.st_size}:{stt.st_mtime_ns}"
+
+def input_size(learner) -> tuple[int, int]:
+    """모델 입력 크기 (h, w). 디코드 시 축소 목표로 쓴다."""
+    return tuple(transform_spec(learner)["size"])
+
+# ======================
+# 예측
+# ======================
+def predict_one(learner, pil_img):
+    """단일 이미지 추론. learner.predict 와 같은 (pred, pred_idx, probs) 를 반환."""
+    from fastai.vision.core import PILImage
+    return learner.predict(PILImage(pil_img))  # 복사 없이 클래스만 PILImage 로 바꿔 넘김
+
+def predict_many(learner, images: list) -> list:
+    """이미지 묶음을 test_dl + get_preds 한 번으로 추론해 (pred, pred_idx, probs) 리스트로 반환."""
+    from fastai.vision.core import PILImage
+    vocab = learner.dls.vocab
+    dl = learner.dls.test_dl([PILImage(im) for im in images], bs=len(images), num_workers=0)
+    with learner.no_bar():
+        probs, _ = learner.get_preds(dl=dl)
+    idxs = probs.argmax(dim=1)
+    return [(str(vocab[int(i)]), i, p) for i, p in zip(idxs, probs)]
+
+# ======================
+# 예측 캐시 (LRU)
+# ======================
+class PredictionCache:
+    """(이미지 바이트 해시, 모델 파일) -> (pred, pred_idx, probs) 를 저장하는 크기/TTL 제한 LRU 캐시."""
+
+    def __init__(self, maxsize: int = 256, ttl: float = 3600):
+        self.maxsize, self.ttl = maxsize, ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    @staticmethod
+    def make_key(img_bytes: bytes, model_id: str) -> str:
+        return f"{model_id}:{hashlib.sha256(img_bytes).hexdigest()}"
+
+    def get(self, key: str):
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and self.ttl > 0 and time.monotonic() - item[0] > self.ttl:
+                del self._data[key]
+                self.evictions += 1
+                item = None
+            if item is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def put(self, key: str, value) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {"size": len(self._data), "hits": self.hits, "misses": self.misses,
+                    "evictions": self.evictions, "hit_rate": self.hits / total if total else 0.0}
+
+# ======================
+# 내보내기 (TorchScript / ONNX)
+# ======================
+def transform_spec(learner, strict: bool = False) -> dict:
+    """dls 의 검증용 변환에서 크기/리사이즈 방식/정규화 값을 뽑아 경량 런타임이 재현할 수 있게 한다.
+
+    fastai 는 size 를 (w, h) 로 들고 있으므로 여기서 [h, w] 로 바꿔 쓴다. strict=True 면 런타임이
+    똑같이 재현하지 못하는 변환이 있을 때 ValueError 를 던진다 (내보내기용).
+    """
+    import math
+    from fastai.vision.augment import Resize, RandomResizedCrop
+    from fastai.data.transforms import Normalize, IntToFloatTensor, ToTensor
+    size, spec, unsupported = None, {"resize_method": "squish"}, []
+    for t in learner.dls.after_item.fs:
+        if isinstance(t, Resize):
+            size = t.size
+            spec = {"resize_method": str(t.method), "pad_mode": str(t.pad_mode), "resample": int(t.mode)}
+        elif isinstance(t, RandomResizedCrop):  # 검증 시: (size + val_xtra) 로 늘린 뒤 가운데 크롭
+            size = t.size
+            spec = {"resize_method": "squish", "resample": int(t.mode),
+                    "val_xtra": math.ceil(max(t.size) * t.val_xtra / 8) * 8}
+        elif not isinstance(t, ToTensor):
+            unsupported.append(type(t).__name__)
+    mean, std = [0.0, 0.0, 0.0], [1.0, 1.0, 1.0]
+    for t in learner.dls.after_batch.fs:
+        if isinstance(t, Normalize) and t.mean is not None:
+            mean, std = t.mean.flatten().tolist(), t.std.flatten().tolist()
+        elif not isinstance(t, (Normalize, IntToFloatTensor)) and getattr(t, "split_idx", None) != 0:
+            unsupported.append(type(t).__name__)  # split_idx == 0 은 학습 때만 쓰는 증강
+    if strict and unsupported:
+        raise ValueError(f"경량 런타임이 재현할 수 없는 검증 변환이 있습니다: {', '.join(unsupported)}")
+    if size is None:
+        if strict:
+            raise ValueError("dls 에서 Resize 를 찾지 못해 입력 크기를 알 수 없습니다.")
+        print("경고: dls 에서 Resize 를 찾지 못해 224x224 로 가정합니다.", file=sys.stderr)
+        size = (224, 224)
+    w, h = size
+    return {"size": [int(h), int(w)], **spec, "mean": mean, "std": std}
+
+def export_model(learner, out_path: str, fmt: str = "torchscript") -> str:
+    """learner.model 을 TorchScript/ONNX 로 내보내고, 라벨·전처리 정보를 `<out_path>.json` 에 저장한다."""
+    import torch
+    spec = transform_spec(learner, strict=True)
+    h, w = spec["size"]
+    model = learner.model.eval().cpu()
+    dummy = torch.zeros(1, 3, h, w)
+    with torch.no_grad():
+        if fmt == "torchscript":
+            torch.jit.freeze(torch.jit.trace(model, dummy)).save(out_path)
+        elif fmt == "onnx":
+            torch.onnx.export(model, dummy, out_path, input_names=["input"], output_names=["logits"],
+                              dynamic_axes={"input": {0: "batch"}, "logits": {0: "batch"}}, opset_version=17)
+        else:
+            raise ValueError(f"지원하지 않는 형식: {fmt}")
+    meta = {"format": fmt, "vocab": [str(x) for x in learner.dls.vocab], **spec}
+    with open(out_path + ".json", "w", encoding="utf-8") as fh:
+        json.dump(meta, fh, ensure_ascii=False, indent=2)
+    return out_path
+
+# ======================
+# CLI
+# ======================
+def classify_paths(predict_batch, vocab, paths, bs: int, out, min_side: int | None = None) -> int:
+    """경로 목록을 배치 단위로 분류해 CSV 로 쓴다. 실패한 파일 수를 반환."""
+    writer = csv.writer(out)
+    writer.writerow(["path", "pred", "prob", *vocab, "error"])
+    failed = 0
+    for chunk in chunked(iter_image_files(paths), bs):
+        ok, images = [], []
+        for p in chunk:
+            try:
+                images.append(load_pil_from_path(p, min_side))
+                ok.append(p)
+            except Exception as e:
+                failed += 1
+                writer.writerow([p, "", "", *[""] * len(vocab), f"{type(e).__name__}: {e}"])
+        if not images: continue
+        for p, (pred, _, probs) in zip(ok, predict_batch(images)):
+            probs = [float(x) for x in probs]
+            writer.writerow([p, pred, f"{max(probs):.6f}", *[f"{x:.6f}" for x in probs], ""])
+        out.flush()
+    return failed
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Fastai 이미지 분류기 추론 도구")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    c = sub.add_parser("classify", help="파일/디렉터리의 이미지를 분류해 CSV 로 출력")
+    c.add_argument("paths", nargs="+")
+    c.add_argument("--model", default=DEFAULT_MODEL_PATH, help="fastai 모델(.pkl) 경로")
+    c.add_argument("--file-id", default=None, help="모델이 없을 때 내려받을 Google Drive 파일 ID")
+    c.add_argument("--sha256", default=None, help="모델 파일 SHA-256 (지정하면 검증 후 사용)")
+    c.add_argument("--runtime", default=None, help="내보낸 모델(.pt/.onnx) 경로. 지정하면 fastai 없이 추론")
+    c.add_argument("--bs", type=int, default=32, help="배치 크기")
+    c.add_argument("--out", default="-", help="출력 CSV 경로 (기본: 표준출력)")
+
+    e = sub.add_parser("export", help="모델을 TorchScript/ONNX 로 내보내기")
+    e.add_argument("--model", default=DEFAULT_MODEL_PATH)
+    e.add_argument("--file-id", default=None)
+    e.add_argument("--sha256", default=None)
+    e.add_argument("--format", choices=["torchscript", "onnx"], default="torchscript")
+    e.add_argument("--out", required=True)
+
+    args = ap.parse_args(argv)
+    if args.cmd == "export":
+        learner = load_model(args.model, args.file_id, args.sha256)
+        export_model(learner, args.out, args.format)
+        print(f"내보내기 완료: {args.out} (+ {args.out}.json)", file=sys.stderr)
+        return 0
+
+    if args.runtime:
+        from runtime import ExportedModel
+        engine = ExportedModel(args.runtime)
+        predict_batch, vocab, size = engine.predict_many, engine.vocab, engine.size
+    else:
+        learner = load_model(args.model, args.file_id, args.sha256)
+        predict_batch, vocab = (lambda ims: predict_many(learner, ims)), [str(x) for x in learner.dls.vocab]
+        size = input_size(learner)
+    out = sys.stdout if args.out == "-" else open(args.out, "w", newline="", encoding="utf-8")
+    try:
+        failed = classify_paths(predict_batch, vocab, args.paths, args.bs, out, min_side=max(size))
+    finally:
+        if out is not sys.stdout: out.close()
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+# 모델 파일 관리: 내려받기 -> 검증 -> 원자적 교체
+# 다운로드가 중간에 끊겨도 잘린 파일이 MODEL_PATH 에 남지 않도록 임시 파일에 받은 뒤 os.replace 한다.
+import os, sys, hashlib, zipfile
+
+class ModelArtifactError(RuntimeError):
+    """모델 파일을 받을 수 없거나 검증에 실패했을 때."""
+
+def sha256_of(path: str, chunk: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(chunk), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def verify_model_file(path: str, sha256: str | None = None, size: int | None = None) -> str | None:
+    """문제가 있으면 사유 문자열, 정상이면 None.
+
+    체크섬/크기가 주어지지 않으면 최소한 비어 있지 않은지, torch.save 형식(zip)이면 끝까지 온전한지 본다.
+    """
+    if not os.path.isfile(path):
+        return "파일이 없음"
+    actual = os.path.getsize(path)
+    if actual == 0:
+        return "빈 파일"
+    if size is not None and actual != int(size):
+        return f"크기 불일치 ({actual} != {size})"
+    if sha256:
+        digest = sha256_of(path)
+        if digest.lower() != sha256.lower():
+            return f"SHA-256 불일치 ({digest})"
+    else:
+        with open(path, "rb") as fh:
+            is_zip_magic = fh.read(2) == b"PK"
+        if is_zip_magic and not zipfile.is_zipfile(path):  # 잘린 zip 은 중앙 디렉터리가 없다
+            return "zip 아카이브가 잘림"
+    return None
+
+def ensure_model(file_id: str | None, path: str, sha256: str | None = None, size: int | None = None) -> str:
+    """검증된 모델 파일 경로를 돌려준다. 없거나 손상됐으면 Google Drive 에서 다시 받는다."""
+    problem = verify_model_file(path, sha256, size)
+    if problem is None:
+        return path
+    if os.path.exists(path):
+        print(f"모델 파일 {path} 을(를) 다시 받습니다: {problem}", file=sys.stderr)
+    if not file_id:
+        raise ModelArtifactError(f"모델 파일 {path} 을(를) 쓸 수 없고 내려받을 파일 ID 도 없습니다: {problem}")
+
+    import gdown
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp = os.path.join(directory, f".{os.path.basename(path)}.{os.getpid()}.part")
+    try:
+        if gdown.download(f"https://drive.google.com/uc?id={file_id}", tmp, quiet=False) is None:
+            raise ModelArtifactError(f"모델 다운로드 실패 (file_id={file_id})")
+        problem = verify_model_file(tmp, sha256, size)
+        if problem:
+            raise ModelArtifactError(f"내려받은 모델 검증 실패: {problem}")
+        os.replace(tmp, path)  # 같은 디렉터리 안에서의 교체는 원자적
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return path
@@ -0,0 +1,177 @@
+# CPU 추론 최적화: intra-op 스레드 수, int8 양자화(dynamic/static), channels_last + inference_mode
+#
+#   python optimize.py check 검증폴더/ --model model.pkl --mode dynamic --threads 4
+#   python optimize.py check 검증폴더/ --mode static --calib-dir 보정폴더/   # 보정폴더는 검증폴더와 겹치지 않게
+#
+# 검증폴더는 라벨 이름의 하위 폴더에 이미지가 들어 있는 구조(검증폴더/<라벨>/*.jpg)여야 한다.
+import os, sys, io, copy, time, argparse
+
+from imaging import load_pil_from_path, iter_image_files, chunked
+
+OPTIMIZE_MODES = ("none", "dynamic", "static")
+
+def default_threads() -> int:
+    """이 프로세스가 쓸 수 있는 CPU 수 (컨테이너 CPU affinity 반영)."""
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return os.cpu_count() or 1
+
+def configure_threads(n: int | None = None) -> int:
+    import torch
+    n = n or default_threads()
+    torch.set_num_threads(n)
+    try:
+        torch.set_num_interop_threads(1)  # 세션마다 따로 forward 를 돌리지 않으므로 inter-op 병렬은 필요 없음
+    except RuntimeError:  # 이미 병렬 작업이 시작된 뒤에는 바꿀 수 없다
+        pass
+    return n
+
+def _cpu_inference_wrapper(model, channels_last: bool):
+    import torch
+    from torch import nn
+
+    class CPUInferenceModel(nn.Module):
+        """fastai TensorImage 를 일반 텐서로 바꾸고 inference_mode 로 forward 하는 래퍼."""
+        def __init__(self, model, channels_last):
+            super().__init__()
+            self.model, self.channels_last = model, channels_last
+
+        def forward(self, x):
+            x = x.as_subclass(torch.Tensor)
+            if self.channels_last: x = x.contiguous(memory_format=torch.channels_last)
+            with torch.inference_mode():
+                return self.model(x)
+
+    return CPUInferenceModel(model, channels_last).eval()
+
+def quantize_dynamic(model):
+    """Linear 가중치만 int8 로 바꾼다. 보정 데이터가 필요 없고 헤드(Linear) 비중이 큰 모델에 효과적."""
+    import torch
+    from torch import nn
+    return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+def quantize_static(model, calib_batches, example):
+    """FX 그래프 모드 정적 양자화. Conv 까지 int8 로 바뀌므로 CNN 본체에 효과가 크지만 보정 배치가 필요하다."""
+    import torch
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import prepare_fx, convert_fx
+    engines = torch.backends.quantized.supported_engines
+    engine = next((e for e in ("x86", "fbgemm", "qnnpack") if e in engines), engines[0])
+    torch.backends.quantized.engine = engine
+    prepared = prepare_fx(copy.deepcopy(model).eval(), get_default_qconfig_mapping(engine), (example,))
+    with torch.inference_mode():
+        for xb in calib_batches:
+            prepared(xb)
+    return convert_fx(prepared)
+
+def calibration_batches(learner, folder: str, count: int = 64, bs: int = 16):
+    """보정용 이미지를 learner 의 검증 변환 그대로 전처리한 배치로 만든다."""
+    import torch
+    from inference import input_size
+    paths = list(iter_image_files([folder]))[:count]
+    if not paths:
+        raise ValueError(f"보정용 이미지가 없습니다: {folder}")
+    min_side = max(input_size(learner))
+    dl = learner.dls.test_dl([load_pil_from_path(p, min_side) for p in paths], bs=bs, num_workers=0)
+    return [b[0].as_subclass(torch.Tensor) for b in dl]
+
+def optimize_learner(learner, mode: str = "dynamic", threads: int | None = None,
+                     channels_last: bool = False, calib_dir: str | None = None):
+    """learner.model 을 CPU 추론용으로 바꾼다 (제자리 변경 후 learner 반환)."""
+    import torch
+    from inference import input_size
+    if mode not in OPTIMIZE_MODES:
+        raise ValueError(f"지원하지 않는 최적화 모드: {mode} (가능: {', '.join(OPTIMIZE_MODES)})")
+    configure_threads(threads)
+    model = learner.model.eval().cpu()
+    if mode == "dynamic":
+        model = quantize_dynamic(model)
+    elif mode == "static":
+        if not calib_dir:
+            raise ValueError("static 양자화에는 보정용 이미지 폴더(calib_dir)가 필요합니다.")
+        h, w = input_size(learner)
+        model = quantize_static(model, calibration_batches(learner, calib_dir), torch.zeros(1, 3, h, w))
+    if channels_last:
+        model = model.to(memory_format=torch.channels_last)
+    learner.model = _cpu_inference_wrapper(model, channels_last)
+    return learner
+
+def model_nbytes(model) -> int:
+    import torch
+    buf = io.BytesIO()
+    torch.save(model.state_dict(), buf)
+    return buf.tell()
+
+# ======================
+# 정확도 비교
+# ======================
+def evaluate(learner, folder: str, bs: int = 32) -> dict:
+    """검증폴더/<라벨>/이미지 구조에서 정확도와 이미지당 지연시간을 잰다. 예측 라벨 목록도 돌려준다."""
+    from inference import input_size, predict_many
+    vocab = [str(x) for x in learner.dls.vocab]
+    min_side = max(input_size(learner))
+    preds, correct, total, elapsed = [], 0, 0, 0.0
+    for chunk in chunked((p for p in iter_image_files([folder]) if os.path.basename(os.path.dirname(p)) in vocab), bs):
+        images = [load_pil_from_path(p, min_side) for p in chunk]
+        t0 = time.perf_counter()
+        results = predict_many(learner, images)
+        elapsed += time.perf_counter() - t0
+        for p, (pred, _, _) in zip(chunk, results):
+            preds.append(pred)
+            correct += pred == os.path.basename(os.path.dirname(p))
+            total += 1
+    if not total:
+        raise ValueError(f"{folder} 에서 라벨({', '.join(vocab)}) 폴더의 이미지를 찾지 못했습니다.")
+    return {"n": total, "accuracy": correct / total, "ms_per_image": 1000 * elapsed / total, "preds": preds}
+
+def compare(model_path: str, folder: str, mode: str, threads: int | None = None,
+            channels_last: bool = False, calib_dir: str | None = None, bs: int = 32) -> dict:
+    """fp32 learner 와 최적화 learner 를 같은 검증폴더로 평가해 정확도/일치율/지연시간/크기를 비교한다.
+
+    static 보정에 검증 이미지를 쓰면 정확도가 부풀려지므로 검증폴더와 다른 calib_dir 을 요구한다.
+    """
+    from inference import load_model
+    if mode == "static":
+        if not calib_dir:
+            raise ValueError("static 모드는 검증폴더와 별도의 보정용 폴더(calib_dir)가 필요합니다.")
+        calib, val = os.path.realpath(calib_dir), os.path.realpath(folder)
+        if os.path.commonpath([calib, val]) in (calib, val):
+            raise ValueError("보정용 폴더가 검증폴더와 겹칩니다. 검증에 쓰지 않는 이미지로 보정하세요.")
+    configure_threads(threads)
+    base = load_model(model_path)
+    opt = optimize_learner(load_model(model_path), mode, threads, channels_last, calib_dir)
+    r_base, r_opt = evaluate(base, folder, bs), evaluate(opt, folder, bs)
+    agree = sum(a == b for a, b in zip(r_base.pop("preds"), r_opt.pop("preds"))) / r_base["n"]
+    return {"fp32": {**r_base, "bytes": model_nbytes(base.model)},
+            mode: {**r_opt, "bytes": model_nbytes(opt.model.model)},
+            "agreement": agree}
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="CPU 최적화 모델의 정확도/속도 점검")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    c = sub.add_parser("check", help="fp32 모델과 최적화 모델을 검증폴더로 비교")
+    c.add_argument("folder", help="검증폴더 (<라벨>/이미지 구조)")
+    c.add_argument("--model", default="model.pkl")
+    c.add_argument("--mode", choices=OPTIMIZE_MODES, default="dynamic")
+    c.add_argument("--threads", type=int, default=None)
+    c.add_argument("--channels-last", action="store_true")
+    c.add_argument("--calib-dir", default=None, help="static 보정용 이미지 폴더 (static 필수, 검증폴더와 겹치면 안 됨)")
+    c.add_argument("--bs", type=int, default=32)
+    c.add_argument("--max-drop", type=float, default=0.01, help="허용하는 정확도 하락폭 (이보다 크면 종료코드 1)")
+    args = ap.parse_args(argv)
+    if args.mode == "static" and not args.calib_dir:
+        ap.error("--mode static 에는 검증폴더와 별도의 --calib-dir 이 필요합니다.")
+
+    r = compare(args.model, args.folder, args.mode, args.threads, args.channels_last, args.calib_dir, args.bs)
+    for name in ("fp32", args.mode):
+        m = r[name]
+        print(f"{name:>8}: 정확도 {m['accuracy']:.4f} ({m['n']}장) · {m['ms_per_image']:.2f} ms/장 · {m['bytes'] / 1e6:.1f} MB")
+    print(f"  예측 일치율: {r['agreement']:.4f}")
+    drop = r["fp32"]["accuracy"] - r[args.mode]["accuracy"]
+    if drop > args.max_drop:
+        print(f"정확도 하락 {drop:.4f} > 허용치 {args.max_drop}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+# 경량 추론 런타임: inference.export_model 로 내보낸 TorchScript/ONNX 모델을
+# fastai 없이 (리사이즈 + 정규화만 적용해) 실행한다. 워커/배치 작업용.
+import json
+
+import numpy as np
+from PIL import Image
+
+_NP_PAD_MODES = {"zeros": "constant", "border": "edge", "reflection": "reflect"}
+
+def crop_pad(pil: Image.Image, sz: tuple, tl: tuple | None = None, pad_mode: str = "zeros",
+             resize_to: tuple | None = None, resample: int = Image.BILINEAR) -> Image.Image:
+    """fastai 의 PIL crop_pad 와 같은 순서(자르기 -> 채우기 -> 리사이즈)로 처리한다. sz/tl/resize_to 는 (w, h)/(x, y)."""
+    ow, oh = pil.size
+    w, h = sz
+    l, t = ((ow - w) // 2, (oh - h) // 2) if tl is None else tl
+    if l >= 0 or t >= 0 or l + w <= ow or t + h <= oh:
+        pil = pil.crop((max(l, 0), max(t, 0), min(l + w, ow), min(t + h, oh)))
+    pads = (max(-l, 0), max(-t, 0), max(w - ow + l, 0), max(h - oh + t, 0))  # 좌, 상, 우, 하
+    if any(pads):
+        arr = np.pad(np.asarray(pil), ((pads[1], pads[3]), (pads[0], pads[2]), (0, 0)), mode=_NP_PAD_MODES[pad_mode])
+        pil = Image.fromarray(arr)
+    if resize_to is not None:
+        pil = pil.resize(tuple(resize_to), resample)
+    return pil
+
+class ExportedModel:
+    """내보낸 모델 + `<path>.json` 메타데이터로 (pred, pred_idx, probs) 를 계산한다."""
+
+    def __init__(self, path: str):
+        with open(path + ".json", encoding="utf-8") as fh:
+            self.meta = json.load(fh)
+        self.vocab = self.meta["vocab"]
+        self.size = tuple(self.meta["size"])  # (h, w)
+        self.method = self.meta.get("resize_method", "squish")
+        self.pad_mode = self.meta.get("pad_mode", "reflection")
+        self.resample = self.meta.get("resample", Image.BILINEAR)
+        self.val_xtra = self.meta.get("val_xtra", 0)
+        self._mean = np.asarray(self.meta["mean"], dtype=np.float32).reshape(3, 1, 1)
+        self._std = np.asarray(self.meta["std"], dtype=np.float32).reshape(3, 1, 1)
+        self.format = self.meta["format"]
+        if self.format == "torchscript":
+            import torch
+            self._torch = torch
+            self._model = torch.jit.load(path, map_location="cpu").eval()
+        elif self.format == "onnx":
+            import onnxruntime as ort
+            self._sess = ort.InferenceSession(path, providers=["CPUExecutionProvider"])
+            self._input = self._sess.get_inputs()[0].name
+        else:
+            raise ValueError(f"지원하지 않는 형식: {self.format}")
+
+    def preprocess(self, pil: Image.Image) -> np.ndarray:
+        """fastai 검증 변환(Resize/RandomResizedCrop -> /255 -> Normalize)을 재현해 (3, H, W) float32 배열을 만든다."""
+        h, w = self.size
+        if pil.mode != "RGB": pil = pil.convert("RGB")
+        ow, oh = pil.size
+        if self.method in ("crop", "pad"):
+            # fastai Resize.encodes (검증: 가운데 기준)
+            fits = ow / w < oh / h if self.method == "crop" else ow / w > oh / h
+            m = ow / w if fits else oh / h
+            cw, ch = int(m * w), int(m * h)
+            pil = crop_pad(pil, (cw, ch), (int(0.5 * (ow - cw)), int(0.5 * (oh - ch))), self.pad_mode, (w, h), self.resample)
+        elif self.val_xtra:
+            pil = crop_pad(pil.resize((w + self.val_xtra, h + self.val_xtra), self.resample), (w, h))
+        elif pil.size != (w, h):
+            pil = pil.resize((w, h), self.resample)
+        x = np.asarray(pil, dtype=np.float32).transpose(2, 0, 1) / 255.0
+        return (x - self._mean) / self._std
+
+    def logits(self, batch: np.ndarray) -> np.ndarray:
+        if self.format == "onnx":
+            return self._sess.run(None, {self._input: batch})[0]
+        with self._torch.inference_mode():
+            return self._model(self._torch.from_numpy(batch)).numpy()
+
+    def predict_many(self, images: list) -> list:
+        batch = np.stack([self.preprocess(im) for im in images]).astype(np.float32, copy=False)
+        z = self.logits(batch)
+        z = np.exp(z - z.max(axis=1, keepdims=True))
+        probs = z / z.sum(axis=1, keepdims=True)
+        idxs = probs.argmax(axis=1)
+        return [(self.vocab[int(i)], int(i), p) for i, p in zip(idxs, probs)]
+
+    def predict(self, image):
+        return self.predict_many([image])[0]
@@ -0,0 +1,111 @@
+# 세션 공용 마이크로 배치 추론 스케줄러
+# 여러 Streamlit 세션(스크립트 스레드)이 공유 learner 를 동시에 부르지 않도록 추론 스레드 하나가 큐를 비우며,
+# 짧은 대기 시간 안에 들어온 요청들을 한 번의 배치 forward 로 묶어 처리한다.
+import time, queue, threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+DEFAULT_MAX_BATCH = 8
+DEFAULT_MAX_WAIT_MS = 10
+
+class MicroBatcher:
+    """predict_batch(images) -> results 를 단일 워커 스레드에서만 호출하는 요청 큐.
+
+    max_batch: 한 번의 forward 에 넣을 최대 이미지 수
+    max_wait_ms: 첫 요청이 들어온 뒤 다른 요청을 더 기다리는 최대 시간
+    max_queue: 대기 중인 요청 수 상한 (넘으면 submit 이 queue.Full 을 던짐)
+
+    결과를 timeout 안에 못 받으면 concurrent.futures.TimeoutError 를 던지고, 아직 시작 전인 요청은 취소한다.
+    """
+
+    def __init__(self, predict_batch, max_batch: int = DEFAULT_MAX_BATCH, max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+                 max_queue: int = 64):
+        self.predict_batch = predict_batch
+        self.max_batch, self.max_wait = max(1, max_batch), max_wait_ms / 1000
+        self._q: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._pending = None  # 직전 배치에 들어가지 못한 요청
+        self._lock = threading.Lock()
+        self.batches = self.items = 0
+        self._worker = threading.Thread(target=self._run, name="inference-worker", daemon=True)
+        self._worker.start()
+
+    def submit(self, images: list, block: bool = False, timeout: float | None = None) -> Future:
+        """이미지 목록(max_batch 장 이하)을 큐에 넣고 결과 리스트를 돌려줄 Future 를 반환한다."""
+        images = list(images)
+        if len(images) > self.max_batch:
+            raise ValueError(f"한 요청은 최대 {self.max_batch}장입니다 ({len(images)}장). predict_many 를 쓰세요.")
+        fut: Future = Future()
+        self._q.put((images, fut), block=block, timeout=timeout)
+        return fut
+
+    @staticmethod
+    def _result(fut: Future, timeout: float | None) -> list:
+        try:
+            return fut.result(timeout)
+        except FutureTimeout:
+            fut.cancel()  # 아직 워커가 집어가지 않았으면 forward 에서 빠진다
+            raise
+
+    def predict(self, image, timeout: float | None = None):
+        return self._result(self.submit([image]), timeout)[0]
+
+    def predict_many(self, images: list, timeout: float | None = None) -> list:
+        """큰 묶음용. max_batch 장씩 나눠 차례로 넣고 기다리므로 그 사이 다른 세션의 요청이 끼어들 수 있다.
+        큐가 차 있으면 자리가 날 때까지 기다린다. timeout 은 조각 하나당 적용된다."""
+        images, out = list(images), []
+        for i in range(0, len(images), self.max_batch):
+            fut = self.submit(images[i:i + self.max_batch], block=True, timeout=timeout)
+            out += self._result(fut, timeout)
+        return out
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"queue_depth": self._q.qsize(), "batches": self.batches, "items": self.items,
+                    "avg_batch": self.items / self.batches if self.batches else 0.0}
+
+    def close(self) -> None:
+        self._q.put((None, None))
+
+    def _next(self, timeout: float | None):
+        if self._pending is not None:
+            item, self._pending = self._pending, None
+            return item
+        return self._q.get(timeout=timeout)
+
+    def _collect(self) -> list | None:
+        first = self._next(None)
+        if first[0] is None: return None
+        jobs, n = [first], len(first[0])
+        deadline = time.monotonic() + self.max_wait
+        while n < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0: break
+            try:
+                job = self._next(remaining)
+            except queue.Empty:
+                break
+            if job[0] is None or n + len(job[0]) > self.max_batch:
+                self._pending = job  # 종료 신호나 넘치는 요청은 다음 차례로
+                break
+            jobs.append(job)
+            n += len(job[0])
+        return jobs
+
+    def _run(self) -> None:
+        while True:
+            jobs = self._collect()
+            if jobs is None: return
+            jobs = [(ims, fut) for ims, fut in jobs if fut.set_running_or_notify_cancel()]
+            if not jobs: continue
+            images = [im for ims, _ in jobs for im in ims]
+            try:
+                results = self.predict_batch(images)
+            except Exception as e:
+                for _, fut in jobs: fut.set_exception(e)
+                continue
+            with self._lock:
+                self.batches += 1
+                self.items += len(images)
+            i = 0
+            for ims, fut in jobs:
+                fut.set_result(results[i:i + len(ims)])
+                i += len(ims)
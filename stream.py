@@ -0,0 +1,240 @@
+# 실시간 스트림 분류: 웹캠/동영상 프레임을 읽어 중복 프레임은 건너뛰고, 추론이 밀리면 프레임을 버리며,
+# 최근 몇 번의 예측 확률을 평균해 라벨이 깜빡이지 않게 한다.
+#
+#   python stream.py --source 0 --model model.pkl          # 0 번 웹캠
+#   python stream.py --source 작업대.mp4 --max-fps 4
+import sys, time, argparse, threading
+from collections import deque
+
+import cv2
+import numpy as np
+from PIL import Image
+
+# ======================
+# 프레임 중복 판정 (dHash)
+# ======================
+def dhash(gray: np.ndarray, size: int = 8) -> int:
+    """흑백 이미지의 가로 밝기 차이로 만든 size*size 비트 지각 해시."""
+    small = cv2.resize(gray, (size + 1, size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+def frame_signature(frame_bgr: np.ndarray, size: int = 16) -> tuple[int, np.ndarray]:
+    """(dHash, size x size 흑백 축소본). dHash 는 밝기 변화에 둔감하므로 축소본으로 전체 밝기/색 변화도 본다."""
+    gray = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (size, size), interpolation=cv2.INTER_AREA)
+    return dhash(small), small
+
+class FrameDeduper:
+    """마지막으로 분류한 프레임과 해시 거리가 threshold 이하이고 축소본 평균 차이가 max_diff 이하이면 중복으로 본다."""
+
+    def __init__(self, threshold: int = 4, max_diff: float = 8.0):
+        self.threshold, self.max_diff = threshold, max_diff
+        self.last: tuple[int, np.ndarray] | None = None
+
+    def is_duplicate(self, sig: tuple[int, np.ndarray]) -> bool:
+        if self.last is None: return False
+        (h0, s0), (h1, s1) = self.last, sig
+        return (bin(h0 ^ h1).count("1") <= self.threshold
+                and float(np.mean(np.abs(s0.astype(np.int16) - s1))) <= self.max_diff)
+
+    def mark(self, sig: tuple[int, np.ndarray]) -> None:
+        self.last = sig
+
+# ======================
+# 추론 빈도 조절
+# ======================
+class AdaptiveSkipper:
+    """추론 시간의 지수 이동 평균으로 다음 추론까지의 최소 간격을 정한다.
+
+    간격 = max(1 / max_fps, 평균 추론 시간 / cpu_budget). cpu_budget=0.5 면 추론 스레드가 절반 이하만 바쁘도록 한다.
+    """
+
+    def __init__(self, max_fps: float = 5.0, cpu_budget: float = 0.5, alpha: float = 0.2):
+        self.max_fps, self.cpu_budget, self.alpha = max_fps, cpu_budget, alpha
+        self.ema: float | None = None
+        self.last_run = 0.0
+
+    @property
+    def interval(self) -> float:
+        base = 1.0 / self.max_fps if self.max_fps > 0 else 0.0
+        return max(base, (self.ema or 0.0) / self.cpu_budget) if self.cpu_budget > 0 else base
+
+    def ready(self, now: float) -> bool:
+        return now - self.last_run >= self.interval
+
+    def update(self, started: float, seconds: float) -> None:
+        self.last_run = started
+        self.ema = seconds if self.ema is None else self.alpha * seconds + (1 - self.alpha) * self.ema
+
+class PredictionSmoother:
+    """최근 window 번의 확률 벡터 평균으로 라벨/신뢰도를 낸다."""
+
+    def __init__(self, vocab: list[str], window: int = 5):
+        self.vocab = vocab
+        self._probs: deque = deque(maxlen=window)
+
+    def push(self, probs) -> tuple[str, float, np.ndarray]:
+        self._probs.append(np.asarray([float(p) for p in probs], dtype=np.float32))
+        mean = np.mean(self._probs, axis=0)
+        i = int(mean.argmax())
+        return self.vocab[i], float(mean[i]), mean
+
+# ======================
+# 프레임 소스
+# ======================
+def open_capture(source: str | int) -> cv2.VideoCapture:
+    src = int(source) if isinstance(source, str) and source.isdigit() else source
+    cap = cv2.VideoCapture(src)
+    if not cap.isOpened():
+        raise RuntimeError(f"영상 소스를 열 수 없습니다: {source}")
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # 카메라 내부 버퍼에 오래된 프레임이 쌓이지 않도록
+    return cap
+
+class LatestFrameReader:
+    """별도 스레드에서 프레임을 계속 읽고 가장 최근 프레임만 보관한다.
+
+    소비자가 늦으면 그 사이 프레임은 덮어써져 버려진다(dropped). 동영상 파일은 원래 fps 속도로 읽어 실시간처럼 재생한다.
+    """
+
+    def __init__(self, source: str | int):
+        self.cap = open_capture(source)
+        fps = self.cap.get(cv2.CAP_PROP_FPS)
+        self.is_file = isinstance(source, str) and not source.isdigit()
+        self.frame_interval = 1.0 / fps if self.is_file and fps and fps > 0 else 0.0
+        self._frame, self._seq, self._taken = None, 0, 0
+        self.consumed = 0
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self.finished = False
+        self.read_count = 0
+        self._thread = threading.Thread(target=self._run, name="frame-reader", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        next_t = time.monotonic()
+        while not self._stop.is_set():
+            ok, frame = self.cap.read()
+            if not ok:
+                break
+            with self._cond:
+                self._frame, self._seq = frame, self._seq + 1
+                self.read_count += 1
+                self._cond.notify_all()
+            if self.frame_interval:
+                next_t += self.frame_interval
+                time.sleep(max(0.0, next_t - time.monotonic()))
+        with self._cond:
+            self.finished = True
+            self._cond.notify_all()
+
+    def latest(self, timeout: float = 1.0):
+        """아직 가져가지 않은 최신 프레임 (없으면 기다렸다가, 끝났으면 None)."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > self._taken or self.finished, timeout)
+            if self._seq == self._taken:
+                return None
+            self._taken = self._seq
+            self.consumed += 1
+            return self._frame
+
+    @property
+    def dropped(self) -> int:
+        """읽었지만 소비자가 가져가기 전에 덮어써진 프레임 수."""
+        with self._cond:
+            return self.read_count - self.consumed - (self._seq > self._taken)
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=2)
+        self.cap.release()
+
+# ======================
+# 스트림 분류기
+# ======================
+def frame_to_pil(frame_bgr: np.ndarray, min_side: int | None = None) -> Image.Image:
+    """BGR 프레임을 (짧은 변 min_side 로 줄인 뒤) RGB PIL 이미지로 바꾼다."""
+    h, w = frame_bgr.shape[:2]
+    if min_side and min(h, w) > min_side:
+        scale = min_side / min(h, w)
+        frame_bgr = cv2.resize(frame_bgr, (round(w * scale), round(h * scale)), interpolation=cv2.INTER_AREA)
+    return Image.fromarray(cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB))
+
+class StreamClassifier:
+    """프레임마다 중복/빈도 검사를 거쳐 필요한 때만 predict(pil) -> (pred, pred_idx, probs) 를 부른다."""
+
+    def __init__(self, predict, vocab: list[str], min_side: int | None = None, dedup_threshold: int = 4,
+                 window: int = 5, max_fps: float = 5.0, cpu_budget: float = 0.5):
+        self.predict, self.min_side = predict, min_side
+        self.deduper = FrameDeduper(dedup_threshold)
+        self.skipper = AdaptiveSkipper(max_fps, cpu_budget)
+        self.smoother = PredictionSmoother(vocab, window)
+        self.last: dict | None = None
+        self._last_probs = None
+        self.stats = {"frames": 0, "inferred": 0, "duplicates": 0, "throttled": 0}
+
+    def process(self, frame_bgr: np.ndarray) -> dict | None:
+        """새 추론을 했으면 갱신된 결과, 아니면 직전 결과를 돌려준다."""
+        self.stats["frames"] += 1
+        now = time.monotonic()
+        if not self.skipper.ready(now):
+            self.stats["throttled"] += 1
+            return self.last
+        sig = frame_signature(frame_bgr)
+        if self.deduper.is_duplicate(sig):
+            # 장면이 그대로면 직전 예측을 다시 넣어 평균 창이 현재 장면으로 수렴하게 한다
+            self.stats["duplicates"] += 1
+            self.skipper.last_run = now
+            probs = self._last_probs
+        else:
+            _, _, probs = self.predict(frame_to_pil(frame_bgr, self.min_side))
+            self.skipper.update(now, time.monotonic() - now)
+            self.deduper.mark(sig)
+            self.stats["inferred"] += 1
+            self._last_probs = probs
+        label, conf, mean = self.smoother.push(probs)
+        self.last = {"label": label, "confidence": conf, "probs": mean, "infer_ms": 1000 * self.skipper.ema}
+        return self.last
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="웹캠/동영상 실시간 분류")
+    ap.add_argument("--source", default="0", help="웹캠 번호 또는 동영상 경로/URL")
+    ap.add_argument("--model", default="model.pkl")
+    ap.add_argument("--runtime", default=None, help="내보낸 모델(.pt/.onnx)")
+    ap.add_argument("--max-fps", type=float, default=5.0, help="초당 최대 추론 횟수")
+    ap.add_argument("--cpu-budget", type=float, default=0.5, help="추론에 쓸 시간 비율 (0~1)")
+    ap.add_argument("--dedup", type=int, default=4, help="중복으로 볼 해시 거리 (0~64)")
+    ap.add_argument("--window", type=int, default=5, help="예측 평균 창 크기")
+    args = ap.parse_args(argv)
+
+    if args.runtime:
+        from runtime import ExportedModel
+        engine = ExportedModel(args.runtime)
+        predict, vocab, size = engine.predict, engine.vocab, engine.size
+    else:
+        from inference import load_model, input_size, predict_one, warm_up
+        learner = load_model(args.model)
+        warm_up(learner)
+        predict, vocab, size = (lambda im: predict_one(learner, im)), [str(x) for x in learner.dls.vocab], input_size(learner)
+    clf = StreamClassifier(predict, vocab, max(size), args.dedup, args.window, args.max_fps, args.cpu_budget)
+    reader = LatestFrameReader(args.source)
+    shown = None
+    try:
+        while True:
+            frame = reader.latest()
+            if frame is None:
+                if reader.finished: break
+                continue
+            r = clf.process(frame)
+            if r and r["label"] != shown:
+                shown = r["label"]
+                print(f"{time.strftime('%H:%M:%S')} {shown} ({r['confidence']:.0%})", flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        reader.close()
+    print(f"{clf.stats} dropped={reader.dropped}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,18 @@
 # streamlit_py
-import os, re
-from io import BytesIO
-import numpy as np
+import os, time, zlib, queue, logging, zipfile, tempfile
+from concurrent.futures import TimeoutError as FutureTimeout
+import cv2
+import pandas as pd
 import streamlit as st
-from PIL import Image, ImageOps
-from fastai.vision.all import *
-import gdown
+from imaging import IMAGE_EXTS, MAX_PIXELS, load_pil_from_bytes, chunked
+from inference import DEFAULT_FILE_ID, DEFAULT_MODEL_PATH, PredictionCache, load_model, model_identity, input_size, predict_many, warm_up
+from optimize import optimize_learner
+from scheduler import DEFAULT_MAX_BATCH, DEFAULT_MAX_WAIT_MS, MicroBatcher
+from assets import load_manifest, load_asset_index, content_by_label
+from timing import StageTimer
+from stream import StreamClassifier, LatestFrameReader
+
+logger = logging.getLogger(__name__)
 
 # ======================
 # 페이지/스타일
@@ -33,6 +40,7 @@ h1 { color:#1E88E5; text-align:center; font-weight:800; letter-spacing:-0.5px; }
 """, unsafe_allow_html=True)
 
 st.title("이미지 분류기 (Fastai) — 확률 막대 + 라벨별 고정 콘텐츠")
+model_status = st.empty()
 
 # ======================
 # 세션 상태
@@ -41,88 +49,226 @@ if "img_bytes" not in st.session_state:
     st.session_state.img_bytes = None
 if "last_prediction" not in st.session_state:
     st.session_state.last_prediction = None
+if "batch_results" not in st.session_state:
+    st.session_state.batch_results = None
+if "decoded" not in st.session_state:
+    st.session_state.decoded = None  # (캐시 키, 디코드된 표시용 이미지) — 재실행마다 다시 디코드하지 않도록
+if "stream_video" not in st.session_state:
+    st.session_state.stream_video = None  # (업로드 파일 식별자, 임시 파일 경로)
+if "stream_end_msg" not in st.session_state:
+    st.session_state.stream_end_msg = None  # (st.info/st.error, 문구) — 스트림이 끝나면 다음 실행에서 토글을 끄고 보여줌
 
 # ======================
-# 모델 로드
+# 모델 설정
+# 모델은 입력 화면을 먼저 그린 뒤에 불러온다 (fastai 는 load_model 안에서 지연 import)
 # ======================
-FILE_ID = st.secrets.get("GDRIVE_FILE_ID", "1Tqr2znfekEJYzZBnm1UIT7QU3lkuVbv7")
-MODEL_PATH = st.secrets.get("MODEL_PATH", "model.pkl")
+FILE_ID = st.secrets.get("GDRIVE_FILE_ID", DEFAULT_FILE_ID)
+MODEL_PATH = st.secrets.get("MODEL_PATH", DEFAULT_MODEL_PATH)
+MODEL_SHA256 = st.secrets.get("MODEL_SHA256")  # 지정하면 내려받은/기존 파일을 검증
+MODEL_SIZE = int(st.secrets["MODEL_SIZE"]) if "MODEL_SIZE" in st.secrets else None  # 바이트
+MODEL_WARMUP = bool(st.secrets.get("MODEL_WARMUP", True))
+
+# CPU 최적화 (옵트인): "none" | "dynamic" | "static"(MODEL_CALIB_DIR 의 이미지로 보정)
+MODEL_OPTIMIZE = st.secrets.get("MODEL_OPTIMIZE", "none")
+MODEL_CALIB_DIR = st.secrets.get("MODEL_CALIB_DIR")
+MODEL_CHANNELS_LAST = bool(st.secrets.get("MODEL_CHANNELS_LAST", False))
+TORCH_THREADS = int(st.secrets["TORCH_THREADS"]) if "TORCH_THREADS" in st.secrets else None
 
 @st.cache_resource
-def load_model_from_drive(file_id: str, output_path: str):
-    if not os.path.exists(output_path):
-        url = f"https://drive.google.com/uc?id={file_id}"
-        gdown.download(url, output_path, quiet=False)
-    return load_learner(output_path, cpu=True)
+def load_model_from_drive(file_id: str, output_path: str, sha256: str | None, size: int | None, warmup: bool,
+                          optimize: str = "none", threads: int | None = None, channels_last: bool = False,
+                          calib_dir: str | None = None):
+    learner = load_model(output_path, file_id, sha256, size)
+    if optimize != "none" or threads or channels_last:
+        optimize_learner(learner, optimize, threads, channels_last, calib_dir)
+    if warmup: warm_up(learner)
+    return learner
 
-with st.spinner("🤖 모델 로드 중..."):
-    learner = load_model_from_drive(FILE_ID, MODEL_PATH)
-st.success("✅ 모델 로드 완료")
+# 예측 캐시 (세션 공용 LRU)
+# 라벨 선택 등 UI 조작으로 스크립트가 다시 실행될 때 같은 이미지를 다시 추론하지 않도록 함
+PRED_CACHE_SIZE = int(st.secrets.get("PRED_CACHE_SIZE", 256))
+PRED_CACHE_TTL = float(st.secrets.get("PRED_CACHE_TTL", 3600))  # 초, 0 이하면 만료 없음
 
-labels = [str(x) for x in learner.dls.vocab]
-st.write(f"**분류 가능한 항목:** `{', '.join(labels)}`")
-st.markdown("---")
+@st.cache_resource
+def get_prediction_cache(maxsize: int, ttl: float) -> PredictionCache:
+    return PredictionCache(maxsize, ttl)
 
-# ======================
-# 라벨 이름 매핑: 여기를 채우세요!
-# 각 라벨당 최대 3개씩 표시됩니다.
-# ======================
-CONTENT_BY_LABEL: dict[str, dict[str, list[str]]] = {
-     
-    labels[0]: {
-       "texts": ["비닐 쓰레기", "비닐류", "재활용"],
-       "images": ["data:image/jpeg;base64,/9j/4AAQSkZJRgABAQAAAQABAAD/2wCEAAkGBwgHBgkIBwgKCgkLDRYPDQwMDRsUFRAWIB0iIiAdHx8kKDQsJCYxJx8fLT0tMTU3Ojo6Iys/RD84QzQ5OjcBCgoKDQwNGg8PGjclHyU3Nzc3Nzc3Nzc3Nzc3Nzc3Nzc3Nzc3Nzc3Nzc3Nzc3Nzc3Nzc3Nzc3Nzc3Nzc3Nzc3N//AABEIALQAvgMBIgACEQEDEQH/xAAcAAACAgMBAQAAAAAAAAAAAAAAAwECBAYHBQj/xABGEAABAwMCAgYGBgYHCQAAAAABAAIDBAUREiEGMRNBUWFxkRQVIlSB0QcyM1KhsSNCVmKTwRYkNFNzsvFDVYKDkpSis9P/xAAYAQEBAQEBAAAAAAAAAAAAAAAAAQIDBP/EACARAQEAAgEFAQEBAAAAAAAAAAABAhESAxMhQVExIqH/2gAMAwEAAhEDEQA/AOSetbj73L5hXlvNznfqkrZCcBudhsAAOQ7AFhYU6Vtlk+tK/wB7k/D5IF0r/e5Pw+SxsIwqMz1zc+iMPpsvRl2sjbmAQDnGeRKX6zr/AHuT8PksfSjSnkZQutx97l8x8ll03FHEFM3o6e8VsTOxkpA8l5elGlFez/THif8AaC4/xyj+mPE/7QXH+OVm2JlFLw9dKi42ikNPSUr2MriZBI6pftEwYfpJGScadms37/ZuVntlFX3irdRW6qZDaKaohpA54ETyIGuLwwtIJ1OPPfOVz5DXJONOKXPLnX6vztylwOWOQ2VP6Y8T/tBcf45Xq0sNqnsra+526KjpnXynZMadr8tpzE7WGklzsHGeZ35dS96houHam7UkFdT2x9wJquihtWJKcwiIlhlGT7WQ4jG+w1JzGlu4v4lcwtdfq8g8wZjjCxBeLn77N5rAjHsjwCa1q3sZDrtc/fZfMfJWjvVyj16a2T9I3Q7IByDg43G3IbjdYjmqulN0ZXra4+9y+Y+SPWtx97l8x8li6UaU3Rletbj73L5hXmvV0nlfNJWyF7yXOIAAJ8AMBYgap0Jumj/Wlx97l8wj1rcfe5fMfJI0o0ptWR62uPvsvmFU3W4+9y+Y+Sxy1RhQX0o0p2lSGLTJGlTpWT0SOiQY2lGlZHRKpYgTpRpTtKNKC1TV1dTRwUU1TI6lptXQxE+zGXHJIHaSefPqXpT8R3F15mudBPNb5pYYoX+jykEtYxjMEjGQdAOOory9CNKcR6l0vlbcLTLbq2WeqL6ptR6RNM572gMc0NAPIe2Tz+G6z6zimiq7i+4zcPsFc5oDporhNGdmhuQBjGwwtdLVGlThAhrfYHgnMapDE1jU0sY72qmlZL2qmlWFJ0o0pulTpRC2hM0q7Y1fQosIIVSE8tSy1FLLVXSnhqnQgY1ic2JDAntC1WYXpUaU7So0KNMdwSy1ZD2KmlEJ0o0p2hWEa1ErH0o0rIMaoWKoTpRpTQxQ4KUigargIaFchYtbKcqYTHKuFNiuFdrVCu0LUrKzQr6VQhyjpFNtBzUtzVcnUjClooxqYW6UMV3lWXwLBXa5VwgBdGIaCrgJbQmtWK2o8JeFkOCS8IBoV8JUbkwuQBSnhMUFqqFhqHMTMKSFMqQgNQQmhqq8LntSnMUtYrEqpOlNhMgTIlUnUpzpV2HEt0LEf9dXc9Ic5IHsKsSsYPU60sQzUgvSXFAKuhts/DFfTRdJUTUUUf3pKlrQfAnmsRls1ODW1tES84bpkJ1HkACBuvRorhU3Kq003D9FWVL9y4vme8gDmXE8gOslbdSWq8RUZ0Wuip6iUg5oqx7X6APq6iM4JO+l2+MbhcMutcJ/TrMOV8NUqOErjSZdVyUUIHMyVIaB8SvPdQMa4t9aWnI5/wBdaujwcH0LmdJcofRjzxDQdI4knJ1SPLi8568N2xsnCycNRey6vn/4rdD/APNZx6+/O41cI5n6Cz/e1o/71qdUcN1cDRJNW22NjxlpfVtAcMZyM810plt4Vb9acu8aBn44asuth4VuHR+kPZqjGlpbQ4IHZy7lb1b6sTji5HFYJJHjTcbUcnqrWE4z2L26Xh2kgoz6TSVtbVPB0uhe0Mb4AEknxOPDkt49TcG/rVJ7yabb/KlGxcD/AFtTS/t9Dbn/ACrN6mV9rJi1JljtmtjfVVyIwNRdJjBx1YVKyxxztLYbZ6HpwGyGdx1d5Dhv5/Jb3SWnhGJobHGx4GTvRAg52PUs+CXhakcI6atZQvzj9BSsid5hmfxWJlnv9asx+ORy8K1+gyNkpngDPsy528cY/FXp+E7nP9j6PKO2J7njzAIXaYeHrXXu6eO4VNRJjUx0zhIW78xqGe5P9Aq6JvtEVLPvCIHHiwYOPAk9y7TLL9rlZHGncCXpv+zh5dTnH8gkScEXrWI+hjJJwAHHc4ztkbrtLa52dMlmqD+/HHJv34LdvNKPpMrndHFWRtPLFG4EfEu/ktb2y4s3gbiB0vRuojHzyXuGAAM52yVnUXAE88HT1M78b/2eFz2HuDwDns5Lqb6Sp/Sam3IiTZzRTgjHxBSY7X+5dc5zk0cQOcYyDoXK8/v+Nzj8cuHBUDp+ja6t1nfTgjSM9eYzjxK8ur4K4g+0prTUyQFxYwh7HkkduD188YXYY2UjpzTemXPp48foHNjD25GxDOj1YPaBjms0Wq7Oz6FiiByXTVEpc45/WDBsT250law57/TLi+dq62V9D/baSaHfHttIGezPbsfJYJavoea1WCkp5Yb5dmVrpG6JY5JRG12d84ySd9xknBXgGx/R43OpsJ3P1XTO/IrthbrzHPx6cWwjC7YywfR07H2LM/edM3zydk6DhD6Op3ezPRb9RrXD8C7Za2jhuEALvzPo54Hk9qN0Lx+7Xkj80wfRxwU0fZMPf6afmmxyWo4gv1TB6O65yMgLw5w5OfjlnAG2erbksEzVfSmR1zqg8nJc3OSe3OoJeVOVjs4+46d3JkCvuLfq3y5j/mvx/wCxX9b3RrQ1t6lIHISPkz/P8157ylOKl6WKdyvZ9fXj3uN+Ox7AT8DunNv14+88+EYI/BhWuFVcsdnFruVtA4iuLfrSAbY3Dh+Ueyq+/wAzvtKl/Vt6RVY7OQLQtY1u+8fMoEsn94//AKinYlO9Z6bEa70nPtSSDr6Okkf2bEvk7gn091bTQGP0SoezP9zEwgdxw8jr6wtZLnO+s4nxOU2NO1id6303iy8Xvtr2ei1tbLTtfrNDV4MkY63QPBwSN8sIaCM7Hq7Lo9e0FLUwTwahh7S5muN4IBDgAQRkEEb7ZwQV80Nld9XSZBkHRvue7sPeN13ngOrdb6Wpt1XIQyiLYxI/YDnsTyBwRss643X1b/U3Gv36iq7RdKaga2pjZWvIYKcse1xJGQ0vGWkAk4OQOrZbtZbB6G2AezHHFkgbvkcScnLyevrGPA4SLtcrLJVUVXU1cZNFI6Run2hktLTkjYc8/BedU/SNbo3D0SJ9SCDpLHbOI6gQCPxyuluP5a5yWzcjfdTVrdz4ytlJKYKXpK+oG3R0o1AHvdy8iT3LnfEvFlfcm4m1iA5LKGnz7QHMuI3IHXnbwWu2/iGedwhhrZKJ5OGsijDW4x2gg+efFbuoklt06dUXriWuaXU8MNthI5hvSPHxIx/4rX60dI5nrm5VlTNMSIYDMTqxgEhnIDtO23blYPD3E1TPdDaquvkraWRwhe/cFpccBzSd8A437/Ar2eJooLXmOnpgZpIwIek9ppJJBc7P1iNsA7b5IOy555fzuN4Y/wBaqXxcLWqLVU1NMzAyQ0gn8F5VRxvw03MdBQVNYR9yLA81za9OnbXzNr3GasBy90p1acjIAB25Ebcu5ebLLJI3TJISBybnYeA5Bbm8ozdY3ToNXx/G37Gz0UX+NMHEeIbk/gvJqeOKmX6sNub/AIdGX4+Ly38lp+EYWuP1LWwS8U1Lv1owf3aKFv5hyozimvY8ltS4NI5CniGPJoXg4VgE4xOT0sKHJhSHuWhVyU5MyqlBRKcmvSlERhCZhUwgkJ8Sx0+JBvP0dcM1dynfdXUzjBTD+quLMiSoBGnA6wOZOQAQM5wQtlqKW9fpIK2rqGUzXHUzDaaPOdzrbGTucnJIPauVR1dTBjoaiePAwNEjhgZzgYPatv4d44qYHMhudTUDGAysiIMrB1BwIIeO5wyOohcOp0+X46Y5cWywwUEEXTtm4cMzc4kq7iJy0eOWn4ZXl3W4xupZK2ouJqoact0egxiGBshO2jOTI4Zzlxc0AHtW0tuNzuUDZqSr4RuQO7Zatj4ZG95bl2fEELQfpI6SB9DG6tjrDKHyTSRMDYukBwGsHY0EdZPtkk77cen0cpl5dL1Jp49HeI5LpI6tmkjpZo3RF0YI0gjAOMnYHcAk+PMopba2krBO252qaOPJY4zuAccEAkFuRuQcd2F4BUL18Pjly23azVdstH2NWysrah4MskcbiGjOQ1gxzzvk/wCnSqJzeIraxrqaWTo3ezLpBDXd+DkAjnt+S+fwdOHciNwRsQe1dQ4C4lkpnQ1LXeyfYnZ1ZHPbv2Px7lm9OSfTn7Yv0o8LzRv9fUkZ6PDIq2P9aJ4GkOx2EBoz24PI5XN3BfTc81NcukbNG2SCpjMcsZGdbCMEY7d/5dmOBcacOTcMXuSic7pKZ/6Sll6pIzy37RyPwPWFnp/zeGRld+Wv4U4UqF3YRhShSgzi/wBlIcVOfYSnFRV8oyl5UgrSJeqYVipYFBOEshPIS3BBTCfCEoNWRE1FS5qWSmuKU5QQJHN/Wx4K0lRNJEI5JpHsYS5rXOJDSQASAeWcDyHYlEIAVE4UEK6jCIUvZ4VnkbdGU0bS8VPsYHPUASD8N/gSvHcEykq56GoE9JM+CZgIa9hwWggg4PVsSPilHZKGtkpoo45MiTGzeZ8l53G3EVhq6CCgvEclbPGXSA0bwHU53GC87EnrAzgnfGFzWa9XOeIxzV9S+M82mQgHxHWsJzlyuFyvlrekO/dzjqycnHioQgrpEChBUKoe5UTAquCIopCAFYBAYUtQpCLFiVCMKUAAnMSgmtKKo9UKs9UKCEIUFEShQgIBwSyE4KrmoUsBQUwBQQqRQIUqMIVBUKyAEQ0FSqhXCCAFKEIIQhGEEZUhAClAK4KWrBFiSqEq+FUhQVyjKnCMIIUqQFOFSqhSoUKIlQQhCooQpAVsIQLKArFQEACmApTVOUQ3KhVBRlUWUqmVOVBdQq5UZQXQqZRlAzKglVyoJVFsqMqmUZQNBUkpYU5UBlRlQVGUFkZVcqpkRTFGVVrlJQCEBBQUUoQgkKUIVQIQhAKEIUApQhBKhCFRCEIQWCkIQiKuVUIUaCS5CFKsMjVihCFSoJQhZpH/2Q==", "https://static.inven.co.kr/image_2011/site_image/valorant/skinimage/skinimage_102002001.jpg?v=200428a"],
-       "videos": ["https://www.youtube.com/shorts/UXgm4YbRt7Q"]
-     },
-
-labels[1]: {
-       "texts": ["종이 쓰레기", "종이류", "재활용"],
-       "images": ["data:image/jpeg;base64,/9j/4AAQSkZJRgABAQAAAQABAAD/2wCEAAkGBwgHBgkIBwgKCgkLDRYPDQwMDRsUFRAWIB0iIiAdHx8kKDQsJCYxJx8fLT0tMTU3Ojo6Iys/RD84QzQ5OjcBCgoKDQwNGg8PGjclHyU3Nzc3Nzc3Nzc3Nzc3Nzc3Nzc3Nzc3Nzc3Nzc3Nzc3Nzc3Nzc3Nzc3Nzc3Nzc3Nzc3N//AABEIALQAvgMBIgACEQEDEQH/xAAbAAACAwEBAQAAAAAAAAAAAAACAwABBAUGB//EAEEQAAEDAwEEBQYOAgAHAAAAAAEAAgMEERIhBRMiMUFRYXHRFDKBkZKhBhYjM0JDUlRiY5OxweFTchUkNERV8PH/xAAYAQEBAQEBAAAAAAAAAAAAAAAAAQIDBP/EAB0RAQEBAQEBAQADAAAAAAAAAAABEQISMSEDE0H/2gAMAwEAAhEDEQA/APmmKmKdgpivRHMrFTFOwVhiuBOKrBaMFMEwIDEWKbirxVwKA/8Aq37O2HtDaTGOoqbeh84pwcgPlC0uANzoLA6nRZcV7H4C7UqqGkrY6SkkqHUzhWlsdS+MvtaPAta12Y472OmnYsfyW88/hjzzvg9tCKnp5nRxkVL4oogJAS50rM2d1wRz5JnxW2p5bBRf8nv55ty1rauN5a4AkghpJHIi5HPRek23tOb4v7JhbHUxzUFRSujFTSvY0FkJB1IAPGOV7kajRd+mpKWDasFTLBRUdSJRO+TyWAODiMiSRIXC9+jXXvXH+zrJrWPkr4ZI3ujmjfG9uhY9pBB6iDqENloldJK90ksj5JD5znuJcT2k6koQ1eifGRxRoJo1sp2Iahi57+un+OdipinlqrFdPrmTimMjRhqZGFKsBuVGwrY1iIRt7tCsV0kY92gMa2FiAtRSQxQMWgMTooF0xyY905Xu11RTKvJk9L5cvdqbtdQ06RJEqYw4K8E8sUDFpkjBNglmpn5U00sLyLF0bywkdVweSYGKixMDvL6yVjo6mrqJmWJAklc8A252J589e1WNrbW+jtWuAGgAqngAdmqRipip5lGdzVGsTy1E1iljXM02mYhqWLRCEM4XPz+us5c0sVYLSWocV0jl1MpOKJrUwNT44UqRImonNWlkSFzFzdYyvCQVrkasxas0aIY1ujiWaELdGV16+s8pihKYpisOjNKVletssazFirFILVWK0YImwrcrFms2KotW7coHxqypjEQrATHMVBq1WSyiYhkCuJcr27c8tDSlyvVkpD3Ll6/XT0q6EqlRK16c+obGtUbljjctDGucl7yJI2Me1R5asEj3RIRUqStWtEhSHBS+SpxU66I0ApzJEgHgbvHAGwv0a26lYe37TPWF6LZXOfjY2ROYUkUtQ3HeQSsvqLxkX7tNU9kcjeF0cgJAcAWEXB6RpyXK2OkqpAsrgtrmuwbwv1vbhNjbnbTWyRJFJhlu32va+JtfqupsUgFaGhqyiCoc/hhkfbni0mw9CQyo2k3Js2yqh9r2cxhA9RT1iOgSlvK5dTU7Wc9u52dLGOkOjJJKKfakMGLZmlk2mURIDm6X1BI0Wp1Ga0uCtrVzv+LQu+bhleOVwAf2Kobahza3Ei5sciAQOk81q/ycszlvkagaEwObJE2SG72O1a5rSQ4XtoQNVGtd/jk9g+C83V2ukpZKF8aKUO+y/wBkhA5zvpNeO9pAUFxsSalqLeYpL5clJbpUgPGujG9q5zTiiMyt+pp1ZI1ywsdxoZ5UgSLUTXUZIhfIsAmVmVTF1rbSVXmy7frZOoGa4HrJXW2LsZ0r3TzbYnIjIDWySAgnne1xy09fYuRWybepqd1RU7cmljaRk0XBOvX0Lk/Gisbi1u600HAT6eeq11UfQZNj08r95LX08r7WykYx5A6gSTZC34PU8vm1dNw3sCyMBoJ1sL2HoXgfjTtD8rr8w+Kv407Q/K5X8w+KxiveS/BrFjdxU0L9blr8AL2te2uvoWZ2wZOJu+2cAbZAOaAbG4uANV4w/Ciu/K9g+Kr4zVn5XsHxQezZsSSJ+Uc9Cw8rte0G3VcBW7ZlY3/vab9ZeLHwmrPyvYPiq+MNZPwtmEf+jQL+lB6isoq5sTtzV05f0fK9Kuno6pzG5VMQNtQZ7fwvIbryuXKeZ5J+kSSf5TJNkO+pmv3i3v8A6QevNDUfe4f1/wCks0VR97h/X/peLfs+ob52HtIDQTfg9pB7ZtFJn8pVwAdJEtzbusEzyJv/AJFvu8V4UUVR+D2lYoqj8HtIPbmib9/Z7vFCaGP7+Pd4rxjNn1Ej8Y2gnU+cBYAXJQeSTfgPc66D2L6KHia2tjL7EgaeKw1FLuH/ADzHjrBHivOilqGsc3IWNiRlpcJLot09m+cy1+V7qo9QYvzGesIdz+YPRbxXDDIXea1h7rJL6NvnQ8BTR6F1J+I+pLNH+L3LhsftCLhjneG/7koxNtL/ADn2k0x2PJPxe5TyX8XuXH3u0P8AOfX/AEhdPtJv1zie9X0Y95LE2Vjo5Gh7HAtcDyIKRSbNo6SLcxwsIuTd7Q469pC2gqOXbIEimo/u1P8ApN8FnnpKP7pT/pN8E+RyyyPXPoK8kofpUlP+mPBLfSUP3SH0RgK3OQFy5qW6jo/u0XshZ5KOj+7RjuFk570pzlZEJFFD9W57O43HvTnPbAxu9dcHp5H9ioxZq6T5XFro+EcnC9+6/oSjQ+Wjl+vLO0sJHj7lQgy+Zmhl7GvAPqNlysskLuLhbzOg7yoroSfJPxkswjmCQEMbKiduUUbcOhz32y7QADogqHbqXd7svsBiRqbdXWtsFRHumRyO3b7WxfcE91+ao5876hrHR7vW9nYvuCNDa1rpLZZvObATfpMl11d211RvshfHHQ3J152CzFsbX4zSCLmRmQ24v0X/AICDIRNJlvLxgcgCDke9am0cODWujY89JIB1R+UQt/6azzyztoO4H91ppsZWY9I946CrErA/Z1O76vD/AFJCWdnSN+aqXjscLhdkxoHNVxHFdT1jf8cncbH32QGaSL52B7O22i7JagI+imGuexzXMyarc5jRqSHX6RdtvWhqqZ1M/fQ+Z0j7P9IWSNkbe9uxZV7yyhKaWpErl11SZSskhWh5SHhZxCUuQpxCzyLOBJQkJzWqntV+IUXNjY5zuQXNqZODzo37w3BAsR2Hp9a1zTcfDIY93Z1y24d2f+hcyaTevc7EDsAsAs1YpaaCPeVbeqPjP8e9Zcl2Nl0+6p945tny8XcOgfz6UgeIm+Ub7pxx7LXunlAQqLloMD8UmsEc9O+ORuYINgBc36CO1USoFcNcvKOLGBsJjI1JdzcfBOhkxxc3oR7TZwMm+yde4rMCsUdgPyY1zelCUijka5mOWrT7loW4gCEFkwqrKoXJHvWObyv09RXKmpHiQiJoDulpNh3jrH7LtgIZIWTGzxcDXVM1Y9NK/gWGSRGZOBZHv41lqmEoSl5qBy0wuRZXLS8pNlM1pTeHidosc9Rv8ty4GNvzhuRYdYP8roupWz07o3NZe9+I206r/v06rz+0d5m5rWiOFriGxjUt10vpqe1c/W3GrMJqJ8mNhjcdy08N+ff/AEkKFMpoJKuVsMPP6Tuho6z4IjTsmgdW1XF8xFYydTupvj2d69FJGn7OpY6anbDC2wHrJ6Se1NlYtRK5r2pJWyVizOatoWAmBitrU8MSDn1/DTvyjfJfSzRc96RSU0mGU0YZ9nI3I9HL137l1S1LcEvOhEcUcXzbbXNz1k9ZRqKKgSqRFUAoiwrUsog3udwLM4pz0khSigVYKFE0KgiowIgFbQgewLnbVpcmb5rbkCzx9odfeF0MuBUCp5a15WmoZqt7mx8EYNjIRp3AdJXoqGjjpmbuFthzJOpceslPbG1rMWtAA5ACwCdE1WTBoYMWJUhT/oLLIgU8JDmJ5QohbWpgVFQIiWS5GpqhCoxuCFPkYlBqgqypGQhsgiiKyFUbRxJb2q2uRWRkkNRBqaGq7LWALKwERQqVoQVhLLlbSoGpkZSgVbSg2OdwLK9HklOKytCShuqcUN1UEVSpRBaIIbIggjmpeCbdUVWSi1LLVoslvCsCiqARWRYoompzVnYU5rlUMVFS6ElBCpZS6IJhoC1EAiUJQDdWCqsrClUV1eKEFFkoaBzUGKYXIC5aw1MVYahyRtcmGiwQuCPJJe5SwQqrqXVKIK6oobqXVguyoqXVFyBbUwKKKgwoooqiwrCiiC1FFFlUVKKJRYVlUonKUsoVFFtECNqiigYEmRRRSqEK1FFGlFQKKIiFAoog/9k="],
-       "videos": ["https://www.youtube.com/shorts/hI9WV_RnPS8"]
-     },
-labels[2]: {
-       "texts": ["플라스틱 쓰레기", "플라스틱류", "재활용"],
-       "images": ["data:image/jpeg;base64,/9j/4AAQSkZJRgABAQAAAQABAAD/2wCEAAkGBwgHBgkIBwgKCgkLDRYPDQwMDRsUFRAWIB0iIiAdHx8kKDQsJCYxJx8fLT0tMTU3Ojo6Iys/RD84QzQ5OjcBCgoKDQwNGg8PGjclHyU3Nzc3Nzc3Nzc3Nzc3Nzc3Nzc3Nzc3Nzc3Nzc3Nzc3Nzc3Nzc3Nzc3Nzc3Nzc3Nzc3N//AABEIALQAvgMBIgACEQEDEQH/xAAbAAACAwEBAQAAAAAAAAAAAAADBAABAgUGB//EAEQQAAEDAwAGBAkJBgcBAAAAAAEAAgMEERIFEyEiMUFRYXGRFDJCU1SBkqHRBiMkM1JyscHhFUNEYpPwRWNzgoPS8TT/xAAYAQEBAQEBAAAAAAAAAAAAAAAAAQIDBP/EAB0RAQEBAAMBAAMAAAAAAAAAAAABEQISITEDE1H/2gAMAwEAAhEDEQA/APmQCuyM1imC74wDirxRsFMFrEBDVeKMGK8EwLYLYajYK8EwCAWooJJpWxwxvlkd4rWNLi7ZfYBtOwFbxXR+T9VHo7TdBWza4x087ZCIrZOINwBcgWJsD1EqcvJoUOitINyc7R9UwNuTlA4WABJJuOgE9gPQsSaOrm0/hLqGqFNYHXGBwjsTsOVrWNxbbzX0ip0rRw0+lNHSSPFTEx9KfCyC7KOmkjyYQbbTYdJLj03SxqKWb5OaOdNJRQyGjbFEK10eLzEA25BDrtuBs61x/by/jWPnc1NNTSvhqY3xSRkh7HggtI5EHgViy73yy3vlXpZzm4E1TyRsJBv1Ljhq7S+ay0yNClYuhBHuIM7FmN0jipij4qYLbAIYiCFEa1MRtWb41CYhWtUntWqdHisNyETEsOYnXMQnMQqsFAxFDERrF1xzL6ta1Tk7FAmhTbidlk1ydUpq11vBll8DWpq9XLwVYJySNDwWozZgGCmCYDVeCqHP29pp2TZtLV8jHbHtdUPIcDxBBO0EX2LEWmdKUzNTRaQqqeBpOMcUzmtFzfYAdiVxUxU6QCqHyVMr56iR8szyXPe8klxPEkniVhrEwWq2MUsa4zR6dm4l6lidiQpwueeus4udgpgmMVWK6SuPKZQQ1MQtWo48k3FCpy+Lx+hFqGWp10aA9qxjoTcslqI9q2xmSQqYLcTN9YY5HYF0+uRyKNqLZDiei3WK7QMpeUp3FAmjUKRcFnBMhi0I1uXHOzSoYpgnhCo6NalTq5zmqAI8jFkNWmQXLTFJWKowuV5468eJgFLyuRHlLvK49nS1LqgrDEIuxetTm58ociOKYZKlYd5FljxZkl5+rJ4a1jXJaR6RM7mvxRmOyTvg05FgbsQH7quKbELM5ei2sxRQt4KWXonjmtrkZj0lPJC3FrtJMppLndNO6QuGwg3GwIDxDuudp7mLfRJBt5WF1jl+Sa1HdjKqUJdmkNHt/jhyuXQPA/BZqNK6PjY3GuZKTyjjffh1gD3rHaNI/dVwvyW2ilqZXQR6Qpg8NDzmcG2Jtsc6wPYCfxRodF5ZavSFG+204zxmw9Tk7Q1hzkMvRHQxt/xCh9VRH/2Q3Rw+N4dS/wBZvxW5y4pfQJFGBVVDGJ3g1VRvk4AeENFuu5JXP+nekUQ6xVMN1b+WZ4xjoSBDASDxXelUZHMeEN2+tEo3TR7s01KQXcfCWnELz266SmT46p4atSNhd/GUw/5B8UtUxaxmrjrqYX4nME26tqhpgFuCSlGT0vDo5zZW6mugL+TWm+XVa66DqNzcvnGH3XU9SpA/FamqdxJukcgyS5K+i3yb6NHPiueSpkt4mui+fJAdOl81glTqa97WUUNPUYuaQywfxPig2f3Xae9MUOjKWanbrIzrmksks42yBsfUePYQvDO0Pp7ytLOPHjUSHjsKyNE6eb4ulni/G1RIL8vyCucldCulpaStqIZqWQFpe5snhZYJWBxAIAB6CLdRQ2V+iXb2pqw8bDeoJLT0XHEJSr0PUR6MdJllUwi9mkkFoG0AHnxPuXm3zyOx5k7BiNpUsqPSy1VLI92UcbwDu6yWYkjsBIHeh62j8bwem9qb4Lz/ANI8zN7BUaKp262Gcn7hUV6QVsLfFbD6pJkeSt0b5McxHK8rge65XltVWej1P9Mq9VWei1P9MoOwK12t8Xcudmbjs5c0Z8rfKjD+1zjbs2rix+FN8ajqSP8ATKbiq3Rsa2opZGC9spAQLIHc4/Ms73fFVnH5lne74oZna5nzLYSAOlx29+xAFRUO/hYfbPxQNF8fmWd7viqzj8yzvd8Utrqj0eP2z8VRmqPR4/aPxQNF7fMs73fFVm3zLO93xSr5pmvxc2mBHEa4XHUdqkcsjvJj9TiR7kDQn1e9HGxj7EXBcSAePEqjVSJSWWRvk3923o4q2uc7yb9hQOR1cn2Q8dBRA6OTxrxnmDxB6Fz3Pb9q35LJm+zw5beSI6moh88PcFWph9IZ3rl67+7q2S5J2pjp6mH0gd4VGKHzw7wuZh/mf+9PFEyb1d6vYx7pyyqyVLstaIXJi0VR0taauGMtk2m17tF+JA5cV1bpaYrPJAZZXJaR2W67EjoIuFuQoS5WAZbG392z2QhP1fm2eyFuUoKSFZs37Le4ImrjczF0bCOgtBWAEVq0Ay0cMbNdDGIyNhx2Ag9SUZ5TegldZzcon9hXMifT72sdIx5twaCLW7VkUfvW7EOXFrHOyfwsOe1MaqN31dVC/qcSw+/Z71ieF0bNZM06sEXcyx2dRCirDPC3uma3AEk42Nhf1WWGMc6V0bWnMcRayd0fLG6n+bdcXPHYUR29VxSN4gEHrB4DvWsHIMrXZNxJtcEBnO/M2WS5zWOxjP8AuICYqw2Ote7k7iOg81hwWQnDQTVuUmQYBzNzt6AEQ6Fd6QPY/VdKge3VavoN0wQtSJXD/Y7vSG+x+qn7Id54ex+q7JCgCuJriikb5WR6uC2II2/ux69qcq48X6zkePalzi3xnNHrus1XuWsRMVHPa1U6TcXS1oKV2KVeVJZN9DLlJdZobwhvCMUKVKhV6vBXZFDdxRSparC25qqyAzfqn/dP4Lz5O/6vyXpGN+af90/gvNjee3s/JSi0bR/1vYD33QCMUbRv/wBDvun8QpA+Wtd5Le7araz+Y2PEZGxWw1EDFuIVqYNZE5rdhG1vUUgx2TMu/tXYxXKq49TV/wAku0dR5qcoqopNXK13I8V07+V0rkuTtE9zosXeTz5diSpR1YCpWFpEkjbIx0bvFIsUg/REbv303rIP5LoqIrrTy76pku4gSFS+4mFrMr99YzWHFZUgOHLMhWAVohUUxqPhuLEQTDkUo9qwGplzVTWINRs+jv3Sd07ALk7FwToys+zGOjeGwepeqgbuLMpWc0eVOj6rymx+2Ct0FNJHUOc5ptieII23C77yguYnUBYxGxVhq0tIC5iSroHTYY2uHX2ki2zjsXTsgSMRHPZRRt3pPnD18B6kwB6lohQBSDNldlallRShKtYKocDlspcFHY5GQ3NWEd4yWRGrisNCJZaDFdlKsUwLZWQpkitgLTQsBy1dA5H4iBKVuN+4hSFZAnLKtxWbqiFS6q6iI0CoW5LK2EKWexVgmXNWcVULFqlkZzUMosYVEImKohWFQIrUFpRGlIyO0LQCywrV1RFkq7qkopZATETmt8Zt1eoc3HhvcFFCAV3WpWOj3Xfor1Ls2t2XO0bUojXKFTB2ePO9kUQuzc3duO1QKuas2TUkTm48NptsKFI3Vv3v0Vw0KysNRHtxxytt6FbSmGsYKIjiglylEJUVFVdWI0UPBauqughCG4IhKwUC90VhQGuyRGuQMBy2HJbJaDloHurug5qw5RBg5NOd9R2j8Fz80QzSbnDZtGxCHZHtke6F3HkViofi+J3Rf8kk+Rznuc7j1bLKPldJjly2DkpVdHdz13K39nuWKeTJ73dP6pMSyYavle3X2LTJHR5Y267pEomcebNW0jeF79qI97ZHuhdx5FLvqJHY8OIPDmEJ73SPydx6tnBaQzVbuHr/ACQ2uQ3yOkxy5cFAUBiUAlbyQZCpVggcoSghyjnKNCZq7pBznZpmJynYwQlXZYzV6xqahGJ7pC4ut3IwUUWoNq1SiCwtqKIMqwoopSKUUUSKsLWZUUVZYLypkVFEol1ReVFFlVZu6VhzyoopVirqB5UUXOtotKKLMGCUN7yoopR//9k="],
-       "videos": ["https://www.youtube.com/shorts/i9IaAccO4P8"]
-     }
-}
-# ======================
-# 유틸
-# ======================
-def load_pil_from_bytes(b: bytes) -> Image.Image:
-    pil = Image.open(BytesIO(b))
-    pil = ImageOps.exif_transpose(pil)
-    if pil.mode != "RGB": pil = pil.convert("RGB")
-    return pil
+# 추론 스케줄러: 모든 세션의 요청을 추론 스레드 하나가 모아서 배치로 처리 (공유 learner 동시 호출 방지)
+SCHED_MAX_BATCH = int(st.secrets.get("SCHED_MAX_BATCH", DEFAULT_MAX_BATCH))
+SCHED_MAX_WAIT_MS = float(st.secrets.get("SCHED_MAX_WAIT_MS", DEFAULT_MAX_WAIT_MS))
+SCHED_MAX_QUEUE = int(st.secrets.get("SCHED_MAX_QUEUE", 64))
+SCHED_TIMEOUT = float(st.secrets.get("SCHED_TIMEOUT", 60))  # 초
+BUSY_MSG = "요청이 많아 지금은 분석할 수 없습니다. 잠시 후 다시 시도하세요."
+
+@st.cache_resource
+def get_scheduler(model_id: str, _learner, _timer: StageTimer, max_batch: int, max_wait_ms: float, max_queue: int) -> MicroBatcher:
+    def predict_batch(images):
+        with _timer.stage("forward"):  # 워커 스레드에서 배치 하나를 돌리는 시간 (대기 제외)
+            return predict_many(_learner, images)
+    return MicroBatcher(predict_batch, max_batch, max_wait_ms, max_queue)
+
+# 실시간 스트림 기본값
+STREAM_MAX_FPS = float(st.secrets.get("STREAM_MAX_FPS", 5.0))
+STREAM_CPU_BUDGET = float(st.secrets.get("STREAM_CPU_BUDGET", 0.5))
+STREAM_WINDOW = int(st.secrets.get("STREAM_WINDOW", 5))
+STREAM_DEDUP_BITS = int(st.secrets.get("STREAM_DEDUP_BITS", 4))
+STREAM_DISPLAY_FPS = 10  # 브라우저로 보내는 미리보기 프레임 수 상한
+STREAM_DISPLAY_WIDTH = 640
+# 서버 쪽 소스(웹캠/경로/URL)는 방문자가 서버의 장치·파일·네트워크에 접근하게 되므로 운영자가 켤 때만 연다.
+# URL/경로 접두사는 "rtsp://cam.local/" 처럼 / 로 끝나게 적는다. 끄면 업로드한 동영상만 쓸 수 있다.
+STREAM_ALLOW_SERVER_SOURCES = bool(st.secrets.get("STREAM_ALLOW_SERVER_SOURCES", False))
+STREAM_ALLOWED_DEVICES = [int(x) for x in st.secrets.get("STREAM_ALLOWED_DEVICES", [0])]
+STREAM_ALLOWED_URL_PREFIXES = tuple(st.secrets.get("STREAM_ALLOWED_URL_PREFIXES", []))
+# 업로드 동영상의 컨테이너 시그니처 (FFmpeg 가 재생 목록 등 다른 형식으로 열지 않도록)
+ISO_BMFF_BOXES = {b"ftyp", b"moov", b"mdat", b"wide", b"free", b"skip"}
 
-def yt_id_from_url(url: str) -> str | None:
-    if not url: return None
-    pats = [r"(?:v=|/)([0-9A-Za-z_-]{11})(?:\?|&|/|$)", r"youtu\.be/([0-9A-Za-z_-]{11})"]
-    for p in pats:
-        m = re.search(p, url)
-        if m: return m.group(1)
-    return None
+def looks_like_video(head: bytes) -> bool:
+    """mp4/mov(ISO BMFF), avi(RIFF AVI), mkv/webm(EBML) 헤더인지 본다."""
+    return (head[4:8] in ISO_BMFF_BOXES
+            or (head[:4] == b"RIFF" and head[8:12] == b"AVI ")
+            or head[:4] == b"\x1aE\xdf\xa3")
 
-def yt_thumb(url: str) -> str | None:
-    vid = yt_id_from_url(url)
-    return f"https://img.youtube.com/vi/{vid}/hqdefault.jpg" if vid else None
+def server_source_allowed(src: str) -> bool:
+    """경로/URL 이 허용 접두사 아래인지. 로컬 경로는 .. 과 심볼릭 링크를 풀어서 비교한다."""
+    if "://" not in src:
+        src = os.path.realpath(src)
+    return src.startswith(STREAM_ALLOWED_URL_PREFIXES)
 
+def drop_stream_video() -> None:
+    """업로드 동영상의 임시 파일을 지우고 세션에서 잊는다 (교체·스트림 종료·입력 변경 시)."""
+    if st.session_state.stream_video is not None:
+        try:
+            os.remove(st.session_state.stream_video[1])
+        except FileNotFoundError:
+            pass
+        st.session_state.stream_video = None
+
+# 단계별 지연시간: 사이드바 패널은 DEBUG_TIMINGS 시크릿 또는 ?debug=1 일 때만.
+# 측정값은 모든 세션이 공유하므로 초기화 버튼과 서버 로그는 운영자가 켠 시크릿일 때만 쓴다.
+DEBUG_TIMINGS_SECRET = bool(st.secrets.get("DEBUG_TIMINGS", False))
+DEBUG_TIMINGS = DEBUG_TIMINGS_SECRET or st.query_params.get("debug") == "1"
+if DEBUG_TIMINGS_SECRET and not logger.handlers:  # 루트 로거는 WARNING 이라 INFO 가 묻히므로 전용 핸들러를 단다
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+@st.cache_resource
+def get_stage_timer() -> StageTimer:
+    return StageTimer()
+
+# ======================
+# 유틸
+# ======================
 def pick_top3(lst):
     return [x for x in lst if isinstance(x, str) and x.strip()][:3]
 
 def get_content_for_label(label: str):
-    """라벨명으로 콘텐츠 반환 (texts, images, videos). 없으면 빈 리스트."""
+    """라벨명으로 콘텐츠 반환 (texts, images, videos=[(영상 주소, 썸네일)]). 없으면 빈 리스트."""
     cfg = CONTENT_BY_LABEL.get(label, {})
     return (
         pick_top3(cfg.get("texts", [])),
         pick_top3(cfg.get("images", [])),
-        pick_top3(cfg.get("videos", [])),
+        [(v, thumb) for v, thumb in cfg.get("videos", []) if isinstance(v, str) and v.strip()][:3],
     )
 
+# ======================
+# 일괄 분류 (여러 파일/zip)
+# ======================
+# 한 번의 forward 크기는 스케줄러의 SCHED_MAX_BATCH 를 넘을 수 없다 (다른 세션 요청이 사이에 끼어들 수 있도록)
+BATCH_SIZE = min(int(st.secrets.get("BATCH_SIZE", SCHED_MAX_BATCH)), SCHED_MAX_BATCH)
+# zip 폭탄 방지: 항목 하나의 크기(MAX_PIXELS 장의 무압축 RGB 크기), zip 하나당 압축 해제 총량과 이미지 수 상한
+ZIP_MAX_MEMBER_BYTES = int(st.secrets.get("ZIP_MAX_MEMBER_BYTES", 3 * MAX_PIXELS))
+ZIP_MAX_TOTAL_BYTES = int(st.secrets.get("ZIP_MAX_TOTAL_BYTES", 1024 * 1024 * 1024))
+ZIP_MAX_ENTRIES = int(st.secrets.get("ZIP_MAX_ENTRIES", 2000))
+# 깨진 zip(CRC 불일치 등), 암호화 항목(RuntimeError), 지원하지 않는 압축 방식(NotImplementedError)
+ZIP_READ_ERRORS = (zipfile.BadZipFile, zlib.error, RuntimeError, NotImplementedError, OSError, EOFError)
+
+def iter_batch_inputs(files):
+    """업로드된 이미지/zip 파일을 (이름, 바이트, 오류) 로 하나씩 펼친다. zip 은 필요할 때만 읽는다.
+
+    상한을 넘거나 읽을 수 없는 zip/항목은 바이트 대신 오류 사유만 돌려준다.
+    """
+    for f in files:
+        if not f.name.lower().endswith(".zip"):
+            yield f.name, f.getvalue(), ""
+            continue
+        try:
+            zf = zipfile.ZipFile(f)
+        except ZIP_READ_ERRORS as e:
+            yield f.name, None, f"zip 을 열 수 없음 — {type(e).__name__}: {e}"
+            continue
+        with zf:
+            count = total = 0
+            for info in zf.infolist():
+                name = info.filename
+                if info.is_dir() or name.startswith("__MACOSX/") or not name.lower().endswith(IMAGE_EXTS):
+                    continue
+                count += 1
+                if count > ZIP_MAX_ENTRIES:
+                    yield f"{f.name}/…", None, f"zip 항목 수 상한({ZIP_MAX_ENTRIES}개) 초과 — 나머지는 건너뜀"
+                    break
+                if info.file_size > ZIP_MAX_MEMBER_BYTES:  # 헤더 크기를 넘는 데이터는 zipfile 이 읽지 않는다
+                    yield f"{f.name}/{name}", None, f"압축 해제 크기 {info.file_size:,} 바이트 > 상한 {ZIP_MAX_MEMBER_BYTES:,}"
+                    continue
+                total += info.file_size
+                if total > ZIP_MAX_TOTAL_BYTES:
+                    yield f"{f.name}/…", None, f"압축 해제 총량 상한({ZIP_MAX_TOTAL_BYTES:,} 바이트) 초과 — 나머지는 건너뜀"
+                    break
+                try:
+                    data = zf.read(info)
+                except ZIP_READ_ERRORS as e:
+                    yield f"{f.name}/{name}", None, f"{type(e).__name__}: {e}"
+                    continue
+                yield f"{f.name}/{name}", data, ""
+
+def iter_batch_items(files):
+    """입력마다 (행, 캐시 키, 디코드한 이미지 또는 None) 을 만든다.
+
+    원본 바이트는 읽는 즉시 디코드(축소)하고 버리므로 배치 하나 분량의 원본을 메모리에 들고 있지 않는다.
+    """
+    for name, b, err in iter_batch_inputs(files):
+        row = {"파일": name, "예측": None, "확률": None, "오류": err}
+        if b is None:
+            yield row, None, None
+            continue
+        key = PredictionCache.make_key(b, MODEL_ID)
+        hit = pred_cache.get(key)
+        if hit is not None:
+            row["_res"] = hit
+            yield row, key, None
+            continue
+        try:
+            img = load_pil_from_bytes(b, DECODE_MIN_SIDE)
+        except Exception as e:  # 깨진 파일은 건너뛰고 표에 사유만 남긴다
+            row["오류"], img = f"{type(e).__name__}: {e}", None
+        yield row, key, img
+
+def run_batch(files, bs: int, on_batch=None) -> pd.DataFrame:
+    """배치 단위로 추론하며 결과 행을 누적한다. on_batch(df, done) 로 진행 상황을 알린다."""
+    rows, done = [], 0
+    for chunk in chunked(iter_batch_items(files), bs):
+        rows += [row for row, _, _ in chunk]
+        todo = [(row, key, img) for row, key, img in chunk if img is not None]
+        if todo:
+            for (row, key, _), res in zip(todo, scheduler.predict_many([img for _, _, img in todo], timeout=SCHED_TIMEOUT)):
+                pred_cache.put(key, res)
+                row["_res"] = res
+        for row in rows[done:]:
+            res = row.pop("_res", None)
+            if res is None: continue
+            pred, _, probs = res
+            row["예측"], row["확률"] = str(pred), float(probs.max())
+            for lbl, p in zip(labels, probs): row[lbl] = float(p)
+        done = len(rows)
+        if on_batch: on_batch(pd.DataFrame(rows), done)
+    return pd.DataFrame(rows)
+
 # ======================
 # 입력(카메라/업로드)
 # ======================
-tab_cam, tab_file = st.tabs(["📷 카메라로 촬영", "📁 파일 업로드"])
+tab_cam, tab_file, tab_batch, tab_stream = st.tabs(["📷 카메라로 촬영", "📁 파일 업로드", "📦 일괄 분류", "🎥 실시간 스트림"])
 new_bytes = None
 
 with tab_cam:
@@ -136,22 +282,139 @@ with tab_file:
     if f is not None:
         new_bytes = f.getvalue()
 
+with tab_batch:
+    files = st.file_uploader("여러 이미지 또는 zip 파일을 업로드하세요",
+                             type=["jpg","png","jpeg","webp","tiff","zip"], accept_multiple_files=True)
+    bs = st.number_input("배치 크기 (한 번에 추론할 이미지 수)", min_value=1, max_value=SCHED_MAX_BATCH, value=BATCH_SIZE, step=1,
+                         help=f"서버 설정(SCHED_MAX_BATCH)에 따라 최대 {SCHED_MAX_BATCH}장입니다.")
+    batch_clicked = st.button("일괄 분류 시작", disabled=not files)
+
+with tab_stream:
+    st.markdown('<div class="helper">업로드한 동영상(또는 허용된 서버 웹캠/스트림)을 연속으로 분류합니다. '
+                '같은 장면이 이어지면 다시 추론하지 않고, 추론이 밀리면 프레임을 건너뜁니다.</div>', unsafe_allow_html=True)
+    src_kinds = ["동영상 파일"]
+    if STREAM_ALLOW_SERVER_SOURCES and STREAM_ALLOWED_DEVICES: src_kinds.append("웹캠")
+    if STREAM_ALLOW_SERVER_SOURCES and STREAM_ALLOWED_URL_PREFIXES: src_kinds.append("경로/URL")
+    src_kind = st.radio("입력", src_kinds, horizontal=True)
+    stream_source = None
+    if src_kind != "동영상 파일":
+        drop_stream_video()
+    if src_kind == "웹캠":
+        stream_source = str(st.selectbox("웹캠 번호", STREAM_ALLOWED_DEVICES))
+    elif src_kind == "동영상 파일":
+        vid = st.file_uploader("동영상 업로드", type=["mp4", "avi", "mov", "mkv"])
+        if vid is not None and not looks_like_video(vid.getvalue()[:12]):
+            st.error("지원하지 않는 동영상 형식입니다 (mp4, mov, avi, mkv).")
+            vid = None
+        if vid is not None:
+            stream_source = vid  # 임시 파일은 스트림을 시작할 때만 쓴다
+        else:
+            drop_stream_video()
+    else:
+        url = st.text_input("경로 또는 스트림 URL", help="허용: " + ", ".join(STREAM_ALLOWED_URL_PREFIXES)).strip()
+        if url and not server_source_allowed(url):
+            st.error("허용되지 않은 경로/URL 입니다.")
+        elif url:
+            stream_source = url
+    c1, c2, c3 = st.columns(3)
+    stream_fps = c1.slider("초당 최대 추론", 0.5, 15.0, STREAM_MAX_FPS, 0.5)
+    stream_budget = c2.slider("CPU 예산 (추론 시간 비율)", 0.1, 1.0, STREAM_CPU_BUDGET, 0.05)
+    stream_window = c3.slider("예측 평균 창", 1, 15, STREAM_WINDOW)
+    if st.session_state.stream_end_msg:  # 끝난 스트림이 다른 입력을 건드릴 때 다시 시작되지 않도록 토글을 끈다
+        show, msg = st.session_state.stream_end_msg
+        st.session_state.stream_on = False
+        st.session_state.stream_end_msg = None
+        show(msg)
+    stream_on = st.toggle("스트림 시작", key="stream_on", disabled=stream_source is None)
+
 if new_bytes:
     st.session_state.img_bytes = new_bytes
 
+# ======================
+# 모델 로드
+# ======================
+with model_status, st.spinner("🤖 모델 로드 중..."):
+    learner = load_model_from_drive(FILE_ID, MODEL_PATH, MODEL_SHA256, MODEL_SIZE, MODEL_WARMUP,
+                                    MODEL_OPTIMIZE, TORCH_THREADS, MODEL_CHANNELS_LAST, MODEL_CALIB_DIR)
+model_status.success("✅ 모델 로드 완료")
+
+pred_cache = get_prediction_cache(PRED_CACHE_SIZE, PRED_CACHE_TTL)
+MODEL_ID = f"{model_identity(MODEL_PATH)}:{MODEL_OPTIMIZE}"  # 양자화 모델은 결과가 조금 다르므로 캐시를 분리
+timer = get_stage_timer()
+scheduler = get_scheduler(MODEL_ID, learner, timer, SCHED_MAX_BATCH, SCHED_MAX_WAIT_MS, SCHED_MAX_QUEUE)
+
+# 업로드 이미지는 짧은 변이 모델 입력의 2배 정도가 되도록 줄여서 디코드 (화면 표시 겸용)
+DECODE_MIN_SIDE = int(st.secrets.get("DECODE_MIN_SIDE", 2 * max(input_size(learner))))
+
+labels = [str(x) for x in learner.dls.vocab]
+st.write(f"**분류 가능한 항목:** `{', '.join(labels)}`")
+st.markdown("---")
+
+# ======================
+# 라벨별 콘텐츠: content/manifest.json 에서 채우세요! (썸네일은 python assets.py build 로 생성)
+# 각 라벨당 최대 3개씩 표시됩니다.
+# ======================
+@st.cache_data
+def load_content(labels: tuple[str, ...]) -> dict[str, dict[str, list]]:
+    return content_by_label(load_manifest(), list(labels), load_asset_index())
+
+CONTENT_BY_LABEL = load_content(tuple(labels))
+
+# ======================
+# 일괄 분류 실행
+# ======================
+with tab_batch:
+    if batch_clicked:
+        progress = st.empty()
+        table = st.empty()
+        def show(df, done):
+            progress.caption(f"{done}개 처리됨")
+            table.dataframe(df, use_container_width=True)
+        try:
+            with st.spinner("🧠 일괄 분석 중..."):
+                st.session_state.batch_results = run_batch(files, int(bs), on_batch=show)
+        except (queue.Full, FutureTimeout):
+            st.warning(BUSY_MSG)
+        progress.empty()
+        table.empty()
+    df = st.session_state.batch_results
+    if df is not None:
+        st.dataframe(df, use_container_width=True)
+        st.download_button("CSV 다운로드", df.to_csv(index=False).encode("utf-8-sig"),
+                           file_name="predictions.csv", mime="text/csv")
+
 # ======================
 # 예측 & 레이아웃
 # ======================
 if st.session_state.img_bytes:
-    top_l, top_r = st.columns([1, 1], vertical_alignment="center")
+    cache_key = PredictionCache.make_key(st.session_state.img_bytes, MODEL_ID)
+    if st.session_state.decoded is not None and st.session_state.decoded[0] == cache_key:
+        pil_img = st.session_state.decoded[1]
+    else:
+        try:
+            with timer.stage("decode"):
+                pil_img = load_pil_from_bytes(st.session_state.img_bytes, DECODE_MIN_SIDE)
+        except Exception as e:  # 손상 파일, 픽셀 수 상한 초과 등
+            st.session_state.img_bytes = st.session_state.decoded = None
+            st.error(f"이미지를 읽을 수 없습니다: {e}")
+            st.stop()
+        st.session_state.decoded = (cache_key, pil_img)
 
-    pil_img = load_pil_from_bytes(st.session_state.img_bytes)
+    top_l, top_r = st.columns([1, 1], vertical_alignment="center")
     with top_l:
         st.image(pil_img, caption="입력 이미지", use_container_width=True)
 
-    with st.spinner("🧠 분석 중..."):
-        pred, pred_idx, probs = learner.predict(PILImage.create(np.array(pil_img)))
-        st.session_state.last_prediction = str(pred)
+    cached = pred_cache.get(cache_key)
+    if cached is None:
+        try:
+            with st.spinner("🧠 분석 중..."), timer.stage("infer"):  # 큐 대기 + forward
+                cached = scheduler.predict(pil_img, timeout=SCHED_TIMEOUT)
+        except (queue.Full, FutureTimeout):
+            st.warning(BUSY_MSG)
+            st.stop()
+        pred_cache.put(cache_key, cached)
+    pred, pred_idx, probs = cached
+    st.session_state.last_prediction = str(pred)
 
     with top_r:
         st.markdown(
@@ -164,6 +427,10 @@ if st.session_state.img_bytes:
             """, unsafe_allow_html=True
         )
 
+    cs = pred_cache.stats()
+    st.caption(f"예측 캐시: {cs['size']}/{PRED_CACHE_SIZE}개 · 적중 {cs['hits']} · 미스 {cs['misses']} · 적중률 {cs['hit_rate']:.0%}")
+
+    t_render = time.perf_counter()
     left, right = st.columns([1,1], vertical_alignment="top")
 
     # 왼쪽: 확률 막대
@@ -198,7 +465,7 @@ if st.session_state.img_bytes:
         texts, images, videos = get_content_for_label(info_label)
 
         if not any([texts, images, videos]):
-            st.info(f"라벨 `{info_label}`에 대한 콘텐츠가 아직 없습니다. 코드의 CONTENT_BY_LABEL에 추가하세요.")
+            st.info(f"라벨 `{info_label}`에 대한 콘텐츠가 아직 없습니다. content/manifest.json 에 추가하세요.")
         else:
             # 텍스트
             if texts:
@@ -227,8 +494,7 @@ if st.session_state.img_bytes:
             # 동영상(유튜브 썸네일)
             if videos:
                 st.markdown('<div class="info-grid">', unsafe_allow_html=True)
-                for v in videos[:3]:
-                    thumb = yt_thumb(v)
+                for v, thumb in videos[:3]:
                     if thumb:
                         st.markdown(f"""
                         <div class="card" style="grid-column:span 6;">
@@ -247,5 +513,80 @@ if st.session_state.img_bytes:
                           <a href="{v}" target="_blank">{v}</a>
                         </div>
                         """, unsafe_allow_html=True)
+    timer.record("render", time.perf_counter() - t_render)
 else:
     st.info("카메라로 촬영하거나 파일을 업로드하면 분석 결과와 라벨별 콘텐츠가 표시됩니다.")
+
+# ======================
+# 디버그: 단계별 지연시간
+# ======================
+if DEBUG_TIMINGS:
+    summary = timer.summary()
+    with st.sidebar.expander("⏱ 단계별 지연시간 (ms)", expanded=True):
+        if summary:
+            st.dataframe(pd.DataFrame(summary).T.round(2), use_container_width=True)
+        st.caption("스케줄러: " + " · ".join(f"{k}={v:.1f}" if isinstance(v, float) else f"{k}={v}"
+                                              for k, v in scheduler.stats().items()))
+        if DEBUG_TIMINGS_SECRET and st.button("측정값 초기화"): timer.reset()
+    if DEBUG_TIMINGS_SECRET and summary: logger.info("stage timings: %s", timer.log_line())
+
+# ======================
+# 실시간 스트림
+# 루프가 스크립트를 붙잡고 있으므로 맨 끝에서 실행한다. 토글을 끄거나 다른 입력을 건드리면 재실행되며 멈춘다.
+# ======================
+if stream_on and stream_source is not None:
+    with tab_stream:
+        frame_box, label_box, stats_box = st.empty(), st.empty(), st.empty()
+        if not isinstance(stream_source, str):  # 업로드한 동영상은 OpenCV 가 열 수 있도록 임시 파일로 쓴다
+            vid_key = (stream_source.name, stream_source.size)
+            if st.session_state.stream_video is None or st.session_state.stream_video[0] != vid_key:
+                drop_stream_video()
+                with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(stream_source.name)[1]) as tmp:
+                    tmp.write(stream_source.getvalue())
+                st.session_state.stream_video = (vid_key, tmp.name)
+            stream_source = st.session_state.stream_video[1]
+        try:
+            reader = LatestFrameReader(stream_source)
+        except RuntimeError as e:
+            drop_stream_video()
+            st.session_state.stream_end_msg = (st.error, f"스트림을 시작하지 못했습니다: {e}")
+            st.rerun()
+        clf = StreamClassifier(lambda im: scheduler.predict(im, timeout=SCHED_TIMEOUT), labels,
+                               max(input_size(learner)), STREAM_DEDUP_BITS, stream_window, stream_fps, stream_budget)
+        last_draw = 0.0
+        try:
+            while True:
+                frame = reader.latest()
+                if frame is None:
+                    if reader.finished: break
+                    # 카메라가 멈춰도 Streamlit 호출이 있어야 중지/재실행 요청을 받아 루프를 빠져나간다
+                    stats_box.caption("프레임을 기다리는 중…")
+                    continue
+                try:
+                    r = clf.process(frame)
+                except (queue.Full, FutureTimeout):  # 다른 세션 요청이 밀려 있으면 이번 프레임은 추론 없이 화면만 갱신
+                    r = clf.last
+                now = time.monotonic()
+                if now - last_draw < 1 / STREAM_DISPLAY_FPS:
+                    continue
+                last_draw = now
+                h, w = frame.shape[:2]
+                if w > STREAM_DISPLAY_WIDTH:
+                    frame = cv2.resize(frame, (STREAM_DISPLAY_WIDTH, round(h * STREAM_DISPLAY_WIDTH / w)), interpolation=cv2.INTER_AREA)
+                frame_box.image(frame, channels="BGR", use_container_width=True)
+                if r:
+                    label_box.markdown(f"""
+                    <div class="prediction-box">
+                        <span style="font-size:1.0rem;color:#555;">실시간 예측:</span>
+                        <h2>{r['label']}</h2>
+                        <div class="helper">최근 {stream_window}회 평균 {r['confidence']:.0%} · 추론 {r['infer_ms']:.0f}ms</div>
+                    </div>
+                    """, unsafe_allow_html=True)
+                cs = clf.stats
+                stats_box.caption(f"프레임 {cs['frames']} · 추론 {cs['inferred']} · 중복 {cs['duplicates']} · "
+                                  f"빈도 제한 {cs['throttled']} · 밀려서 버림 {reader.dropped}")
+        finally:
+            reader.close()
+            drop_stream_video()  # 중지/재실행/세션 종료 시에도 임시 파일을 남기지 않는다
+        st.session_state.stream_end_msg = (st.info, "스트림이 끝났습니다.")
+        st.rerun()
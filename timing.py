@@ -0,0 +1,48 @@
+# 단계별 지연시간 계측 (디코드/추론/렌더링 등). 최근 window 개 측정값으로 p50/p95/p99 를 낸다.
+import time, threading
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+def percentile(sorted_vals: list, q: float) -> float:
+    """정렬된 값에서 선형 보간 백분위수 (q: 0~100)."""
+    if not sorted_vals: return 0.0
+    k = (len(sorted_vals) - 1) * q / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_vals) - 1)
+    return sorted_vals[lo] + (sorted_vals[hi] - sorted_vals[lo]) * (k - lo)
+
+class StageTimer:
+    """단계 이름별 소요 시간(초)을 모으는 스레드 안전 계측기. 세션 간에 공유해도 된다."""
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._samples: dict[str, deque] = defaultdict(lambda: deque(maxlen=self.window))
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - t0)
+
+    def record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self._samples[name].append(seconds)
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """단계별 {n, mean, p50, p95, p99} (밀리초)."""
+        with self._lock:
+            snap = {k: sorted(v) for k, v in self._samples.items()}
+        return {k: {"n": len(v), "mean": 1000 * sum(v) / len(v),
+                    "p50": 1000 * percentile(v, 50), "p95": 1000 * percentile(v, 95), "p99": 1000 * percentile(v, 99)}
+                for k, v in snap.items() if v}
+
+    def log_line(self) -> str:
+        return " | ".join(f"{k} p50={s['p50']:.1f} p95={s['p95']:.1f} p99={s['p99']:.1f}ms (n={s['n']})"
+                          for k, s in self.summary().items())
+
+    def reset(self) -> None:
+        with self._lock:
+            self._samples.clear()